@@ -1,4 +1,6 @@
 import os
+import sys
+import click
 from datetime import datetime, timedelta
 from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, current_app
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
@@ -12,18 +14,44 @@ import math
 from sqlalchemy import func, inspect
 from sqlalchemy import or_
 from utils import format_ist_datetime, utc_to_ist
+from spot_allocator import spot_allocator
+from cache import cache, LOTS_TAG
+from versions import bump_lot_version
+from spot_grid import prune_changes
+from revenue import rebuild_revenue, rebuild_user_totals
+from occupancy import occupancy_sampler, take_sample, compact_snapshots
+from events import availability_watcher
+import compression
+from profiling import profiler
+from metrics import metrics
+from passwords import password_hasher
+from user_cache import load_cached_user
+from config import get_config
+from database import apply_sqlite_pragmas, dispose_pool_after_fork, require_returning, schema_state, stamp_head
+from replica import configure_replica
 
 app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'I am Alok Tripathi and this is my secret key!')
+app.config.from_object(get_config())
 
 os.makedirs(app.instance_path, exist_ok=True)
-db_path = os.path.join(app.instance_path, 'database.db')
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['DEBUG'] = True 
+if not app.config['SQLALCHEMY_DATABASE_URI']:
+    db_path = os.path.join(app.instance_path, 'database.db')
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+elif app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgres://'):
+    # Heroku-style URLs use a scheme SQLAlchemy no longer accepts
+    app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'].replace('postgres://', 'postgresql://', 1)
+configure_replica(app)
 
 db.init_app(app)
-migrate = Migrate(app, db)
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+migrate = Migrate(app, db, directory=MIGRATIONS_DIR)
+cache.init_app(app)
+compression.init_app(app)
+occupancy_sampler.init_app(app)
+availability_watcher.init_app(app)
+profiler.init_app(app)
+metrics.init_app(app)
+password_hasher.init_app(app)
 
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -38,10 +66,12 @@ app.jinja_env.globals.update(
 from routes.main import main_bp
 from routes.admin import admin_bp
 from routes.user import user_bp
+from routes.api import api_bp
 
 app.register_blueprint(main_bp)
 app.register_blueprint(admin_bp, url_prefix='/admin')
 app.register_blueprint(user_bp, url_prefix='/user')
+app.register_blueprint(api_bp, url_prefix='/api')
 
 def create_default_admin():
     admin_email = os.environ.get('ADMIN_EMAIL', 'admin@parkease.com')
@@ -60,13 +90,60 @@ def create_default_admin():
         admin.set_password(admin_password)
         db.session.add(admin)
         db.session.commit()
-        print(f"Default admin created: {admin_email}")
+        app.logger.info('Default admin created: %s', admin_email)
     else:
-        print(f"Admin already exists: {admin_email}")
+        app.logger.debug('Admin already exists: %s', admin_email)
+
+def bootstrap_database():
+    """Create the tables and the default admin on a new or up-to-date database.
+
+    A database behind the migrations is left alone: create_all() would add
+    the newer tables but not the newer columns, and `flask db upgrade` would
+    then stop at the tables it finds already there. Returns False then.
+    """
+    state = schema_state(db.engine, MIGRATIONS_DIR)
+    if state == 'behind':
+        return False
+    # Only the primary; a replica bind is read-only
+    db.create_all(bind_key=None)
+    if state == 'empty':
+        stamp_head(db.engine, MIGRATIONS_DIR)
+    create_default_admin()
+    return True
+
+def cli_command():
+    """The flask subcommand being run (e.g. 'db'), or None outside the flask CLI."""
+    if click.get_current_context(silent=True) is None:
+        return None
+    args = iter(sys.argv[1:])
+    for arg in args:
+        if arg in ('--app', '-A', '--env-file', '-e'):
+            next(args, None)
+        elif not arg.startswith('-'):
+            return arg
+    return None
 
 with app.app_context():
-    db.create_all()
-    create_default_admin()
+    apply_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+    require_returning(db.engine)
+    for engine in db.engines.values():
+        dispose_pool_after_fork(engine)
+    # `flask db ...` imports the app too; the migrations own the schema then.
+    if app.config['AUTO_BOOTSTRAP'] and cli_command() != 'db' and not bootstrap_database():
+        app.logger.warning('The database schema is behind the migrations; '
+                           'run `flask --app app db upgrade` (see README)')
+    # Before `flask init-db` has run there is nothing to load yet.
+    if inspect(db.engine).has_table(ParkingSpot.__tablename__):
+        spot_allocator.rebuild()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create missing tables and the default admin user."""
+    if not bootstrap_database():
+        print("The database schema is behind the migrations; run `flask --app app db upgrade` first")
+        return
+    spot_allocator.rebuild()
+    print("Database initialised")
 
 # -------------------- Error Handling --------------------
 
@@ -76,7 +153,7 @@ def internal_error(error):
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return load_cached_user(int(user_id))
 
 def has_active_booking(user_id):
     """Check if user has any active bookings"""
@@ -88,6 +165,7 @@ def has_active_booking(user_id):
     return active_booking is not None
 
 def verify_spot_statuses(lot_id):
+    lot = ParkingLot.query.get(lot_id)
     spots = ParkingSpot.query.filter_by(lot_id=lot_id).all()
         
     active_reservations = Reservation.query.filter(
@@ -95,18 +173,77 @@ def verify_spot_statuses(lot_id):
         Reservation.leaving_timestamp.is_(None)).all()
         
     occupied_spot_ids = {res.spot_id for res in active_reservations}
+    repaired = False
         
     for spot in spots:
         should_be_occupied = spot.id in occupied_spot_ids
         if should_be_occupied and spot.status != 'O':
             app.logger.warning(f"Fixing spot {spot.id} status from {spot.status} to O")
             spot.status = 'O'
+            repaired = True
         elif not should_be_occupied and spot.status != 'A':
             app.logger.warning(f"Fixing spot {spot.id} status from {spot.status} to A")
             spot.status = 'A'
+            repaired = True
+    
+    total_spots = len(spots)
+    occupied_spots = len(occupied_spot_ids)
+    if lot and (lot.total_spots, lot.occupied_spots) != (total_spots, occupied_spots):
+        app.logger.warning(f"Fixing lot {lot_id} counters from {lot.total_spots}/{lot.occupied_spots} to {total_spots}/{occupied_spots}")
+        lot.total_spots = total_spots
+        lot.occupied_spots = occupied_spots
+        repaired = True
+    if repaired:
+        # Repairs are not in the spot change log, so this forces a full spot map reload.
+        bump_lot_version(lot_id)
         
     db.session.commit()
+    spot_allocator.rebuild(lot_id)
+    cache.invalidate_lot(lot_id)
     return True
 
+@app.cli.command('reconcile-lots')
+def reconcile_lots_command():
+    """Repair spot statuses and lot occupancy counters that have drifted."""
+    lot_ids = [lot_id for (lot_id,) in db.session.query(ParkingLot.id).all()]
+    for lot_id in lot_ids:
+        verify_spot_statuses(lot_id)
+    print(f"Reconciled {len(lot_ids)} parking lots")
+
+@app.cli.command('prune-spot-changes')
+def prune_spot_changes_command():
+    """Drop spot change log rows older than SPOT_CHANGE_RETENTION_HOURS."""
+    cutoff = datetime.utcnow() - timedelta(hours=app.config['SPOT_CHANGE_RETENTION_HOURS'])
+    pruned = prune_changes(cutoff)
+    db.session.commit()
+    print(f"Pruned {pruned} spot changes")
+
+@app.cli.command('backfill-revenue')
+def backfill_revenue_command():
+    """Rebuild the daily lot revenue rollup and users' totals from reservations."""
+    rows = rebuild_revenue()
+    rebuild_user_totals()
+    db.session.commit()
+    cache.invalidate(LOTS_TAG)
+    print(f"Rebuilt {rows} daily revenue rows")
+
+@app.cli.command('sample-occupancy')
+def sample_occupancy_command():
+    """Record one occupancy sample for every lot (for cron when the sampler thread is off)."""
+    interval = app.config['OCCUPANCY_SAMPLE_SECONDS'] or 300
+    lots = take_sample(interval)
+    db.session.commit()
+    print(f"Sampled {lots} parking lots")
+
+@app.cli.command('compact-occupancy')
+def compact_occupancy_command():
+    """Fold old occupancy samples into hourly rows and drop expired ones."""
+    folded, dropped = compact_snapshots(
+        timedelta(hours=app.config['OCCUPANCY_RAW_RETENTION_HOURS']),
+        timedelta(days=app.config['OCCUPANCY_RETENTION_DAYS'])
+    )
+    db.session.commit()
+    print(f"Folded {folded} samples into hourly rows, dropped {dropped} expired rows")
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=app.config['DEBUG'])
\ No newline at end of file
@@ -0,0 +1,11 @@
+"""Benchmarks against a seeded database.
+
+    python -m bench generate --lots 20 --spots 100 --users 5000 --years 2
+    python -m bench run --json before.json
+    python -m bench run booking_rush history_export --compare before.json
+    python -m bench run --url http://127.0.0.1:5000    # a server on the same database
+
+`generate` writes bench/data/bench.db (or fills DATABASE_URL when it is set);
+`run` works on a copy of it so every run starts from the same rows. Run from
+the repository root.
+"""
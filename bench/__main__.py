@@ -0,0 +1,153 @@
+import argparse
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'bench.db')
+DEFAULT_SCENARIOS = ('booking_rush', 'dashboard_polling', 'history_export', 'query_budgets')
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m bench', description=__import__('bench').__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help='build a seeded benchmark database')
+    generate.add_argument('--db', default=DEFAULT_DB, help='SQLite file to create (ignored when DATABASE_URL is set)')
+    generate.add_argument('--lots', type=int, default=10)
+    generate.add_argument('--spots', type=int, default=50, help='spots per lot')
+    generate.add_argument('--users', type=int, default=1000)
+    generate.add_argument('--years', type=float, default=1.0, help='years of reservation history')
+    generate.add_argument('--seed', type=int, default=42)
+    generate.add_argument('--end', help='last day of history, YYYY-MM-DD (default: today)')
+    generate.add_argument('--force', action='store_true', help='replace an existing file')
+
+    run = commands.add_parser('run', help='run scenarios and print a report')
+    run.add_argument('scenarios', nargs='*', help=f'default: {" ".join(DEFAULT_SCENARIOS)}; "all" runs every one')
+    run.add_argument('--db', default=DEFAULT_DB, help='generated SQLite file; runs use a copy of it')
+    run.add_argument('--threads', type=int, default=8)
+    run.add_argument('--duration', type=float, default=10.0, help='seconds per scenario')
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--url', help='drive a running server instead of the test client')
+    run.add_argument('--json', dest='json_path', help='save the report here')
+    run.add_argument('--compare', help='report JSON to show deltas against')
+
+    commands.add_parser('list', help='list scenarios')
+    return parser.parse_args(argv)
+
+
+def use_database(path):
+    # Must happen before the app is imported: config reads DATABASE_URL at import
+    if not os.environ.get('DATABASE_URL'):
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(path)
+    # Background sampling would add writes the scenarios did not make
+    os.environ.setdefault('OCCUPANCY_SAMPLE_SECONDS', '0')
+
+
+def remove_sqlite(path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def generate_command(args):
+    if not os.environ.get('DATABASE_URL'):
+        if os.path.exists(args.db):
+            if not args.force:
+                sys.exit(f'{args.db} already exists; pass --force to replace it')
+            remove_sqlite(args.db)
+        os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+    use_database(args.db)
+
+    from app import app, bootstrap_database
+    from models import db, User
+    from cache import cache, LOTS_TAG
+    from bench.datagen import generate
+
+    end = datetime.strptime(args.end, '%Y-%m-%d') if args.end else None
+    with app.app_context():
+        if not bootstrap_database():
+            sys.exit('The database schema is behind the migrations; run `flask --app app db upgrade` first')
+        if db.session.query(User).filter(User.email.like('bench-user-%')).count():
+            sys.exit('The database already holds benchmark data')
+        started = time.perf_counter()
+        summary = generate(lots=args.lots, spots=args.spots, users=args.users, years=args.years,
+                           seed=args.seed, end=end)
+        cache.invalidate(LOTS_TAG)
+    print(f"Generated in {time.perf_counter() - started:.1f}s: {summary}")
+
+
+def run_command(args):
+    names = args.scenarios or list(DEFAULT_SCENARIOS)
+    if not os.environ.get('DATABASE_URL'):
+        if not os.path.exists(args.db):
+            sys.exit(f'{args.db} not found; run `python -m bench generate` first')
+        if args.url:
+            # The server under test has to open the same file
+            working = args.db
+        else:
+            # Scenarios write; keep the generated file pristine
+            working = args.db + '.run'
+            remove_sqlite(working)
+            shutil.copyfile(args.db, working)
+        use_database(working)
+    else:
+        use_database(args.db)
+
+    from app import app
+    from models import db
+    from bench.drivers import Driver, Recorder
+    from bench.scenarios import SCENARIOS, Context
+    from bench import report
+
+    if names == ['all']:
+        names = list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        sys.exit(f'Unknown scenarios: {", ".join(unknown)} (see `python -m bench list`)')
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    recorder = Recorder()
+    driver = Driver(app, recorder, base_url=args.url)
+    for name in names:
+        # Reload the free users and lots for every scenario
+        ctx = Context(app, driver, recorder, threads=args.threads, duration=args.duration, seed=args.seed)
+        recorder.scenario = name
+        print(f'running {name} ...', file=sys.stderr)
+        started = time.perf_counter()
+        SCENARIOS[name](ctx)
+        # Scenarios that log in first time only their measured phase
+        recorder.wall_time.setdefault(name, time.perf_counter() - started)
+
+    with app.app_context():
+        dialect = db.engine.dialect.name
+    result = report.build_report(recorder, {
+        'dialect': dialect,
+        'app_env': os.environ.get('APP_ENV', 'development'),
+        'driver': args.url or 'test-client',
+        'threads': args.threads,
+        'duration': args.duration,
+        'seed': args.seed,
+        'scenarios': names,
+    })
+    baseline = report.load(args.compare) if args.compare else None
+    print(report.format_report(result, baseline))
+    if args.json_path:
+        report.save(result, args.json_path)
+
+
+def list_command(args):
+    from bench.scenarios import SCENARIOS
+    for name, fn in SCENARIOS.items():
+        print(f'{name:<20} {(fn.__doc__ or "").strip().splitlines()[0]}')
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    {'generate': generate_command, 'run': run_command, 'list': list_command}[args.command](args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""Deterministic seed data: lots, spots, users and years of reservation history.
+
+The same parameters and seed always produce the same rows, so benchmark
+runs against a generated database are comparable across commits.
+"""
+import math
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import insert, update, func, select
+from passwords import password_hasher
+from models import db, User, ParkingLot, ParkingSpot, Reservation, OccupancySnapshot
+from lot_capacity import add_spots
+from revenue import rebuild_revenue, rebuild_user_totals
+from utils import IST_OFFSET
+from occupancy import floor_ist_hour
+
+BENCH_PASSWORD = 'bench123'
+PRICES = (20, 30, 40, 50, 60, 80, 100)
+CHUNK = 10000
+
+# Relative arrival rate per IST hour: quiet nights, a morning and an evening peak
+HOURLY_DEMAND = (
+    0.1, 0.05, 0.05, 0.05, 0.1, 0.2, 0.5, 1.0, 1.6, 1.8, 1.5, 1.2,
+    1.1, 1.0, 1.0, 1.1, 1.3, 1.6, 1.8, 1.5, 1.0, 0.6, 0.3, 0.2,
+)
+WEEKEND_DEMAND = 0.7
+# Mean free time between stays of one spot at demand 1.0
+MEAN_IDLE_HOURS = 3.0
+# Stays are log-normal around two hours, capped at a day
+MEDIAN_STAY_HOURS = 2.0
+STAY_SIGMA = 0.8
+MAX_STAY_HOURS = 24
+# Days of hourly occupancy snapshots derived for the dashboard heatmap
+SNAPSHOT_DAYS = 28
+
+
+def user_email(index):
+    return f'bench-user-{index}@example.com'
+
+
+def _demand(utc_dt):
+    ist = utc_dt + IST_OFFSET
+    weekend = WEEKEND_DEMAND if ist.weekday() >= 5 else 1.0
+    return HOURLY_DEMAND[ist.hour] * weekend
+
+
+def _spot_history(rng, start, end):
+    """(parked, left) intervals of one spot; the last may still be open at end."""
+    stays = []
+    t = start + timedelta(hours=rng.expovariate(1 / MEAN_IDLE_HOURS))
+    while t < end:
+        # Thinning: propose arrivals at peak rate, keep them in proportion to demand
+        if rng.random() * max(HOURLY_DEMAND) <= _demand(t):
+            hours = min(rng.lognormvariate(math.log(MEDIAN_STAY_HOURS), STAY_SIGMA), MAX_STAY_HOURS)
+            left = t + timedelta(hours=hours)
+            stays.append((t, left))
+            t = left
+        t += timedelta(hours=rng.expovariate(max(HOURLY_DEMAND) / MEAN_IDLE_HOURS))
+    return stays
+
+
+def _insert_chunked(model, rows):
+    for i in range(0, len(rows), CHUNK):
+        db.session.execute(insert(model), rows[i:i + CHUNK])
+
+
+def generate(lots=10, spots=50, users=1000, years=1.0, seed=42, end=None, log=print):
+    """Fill an empty database. end (naive UTC) defaults to today's midnight.
+
+    Returns a dict of what was created.
+    """
+    rng = random.Random(seed)
+    end = end or datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    start = end - timedelta(days=365 * years)
+
+    password_hash = password_hasher.hash(BENCH_PASSWORD)
+    _insert_chunked(User, [{
+        'email': user_email(i), 'name': f'Bench User {i}', 'password_hash': password_hash,
+        'address': f'{i} Bench Street', 'pincode': f'{400001 + i % 100}', 'role': 'user',
+        'created_at': start - timedelta(days=rng.randrange(30))
+    } for i in range(users)])
+    user_ids = db.session.scalars(
+        select(User.id).where(User.email.like('bench-user-%')).order_by(User.id)
+    ).all()
+    log(f'{len(user_ids)} users')
+
+    lot_rows = []
+    for n in range(lots):
+        lot = ParkingLot(
+            prime_location_name=f'Bench Lot {n + 1}', price=rng.choice(PRICES),
+            address=f'{n + 1} Bench Road', pincode=400001 + n, max_spots=spots,
+            total_spots=0, created_at=start
+        )
+        db.session.add(lot)
+        db.session.flush()
+        lot_rows.append((lot, add_spots(lot, spots)))
+    log(f'{lots} lots with {spots} spots each')
+
+    reservations = []
+    open_spots = []
+    open_users = set()
+    for lot, spot_ids in lot_rows:
+        for spot_id in spot_ids:
+            for parked, left in _spot_history(rng, start, end):
+                # A few regulars park a lot, most users rarely
+                user_id = user_ids[int(len(user_ids) * rng.random() ** 2)]
+                row = {'spot_id': spot_id, 'user_id': user_id, 'vehicle_number': f'MH{user_id % 100:02d}BN{user_id:04d}',
+                       'parking_timestamp': parked, 'leaving_timestamp': left, 'force_released': False}
+                if left > end:
+                    # Still parked at the end: keep it open if the user has no other open stay
+                    if user_id in open_users:
+                        continue
+                    open_users.add(user_id)
+                    open_spots.append(spot_id)
+                    row['leaving_timestamp'] = None
+                    row['parking_cost'] = None
+                else:
+                    row['parking_cost'] = round((left - parked).total_seconds() / 3600 * lot.price, 2)
+                reservations.append(row)
+    _insert_chunked(Reservation, reservations)
+    log(f'{len(reservations)} reservations, {len(open_spots)} still open')
+
+    for i in range(0, len(open_spots), CHUNK):
+        db.session.execute(
+            update(ParkingSpot).where(ParkingSpot.id.in_(open_spots[i:i + CHUNK])).values(status='O')
+        )
+    occupied = dict(db.session.execute(
+        select(ParkingSpot.lot_id, func.count()).where(ParkingSpot.status == 'O').group_by(ParkingSpot.lot_id)
+    ).all())
+    for lot, _ in lot_rows:
+        lot.occupied_spots = occupied.get(lot.id, 0)
+
+    rebuild_revenue()
+    rebuild_user_totals()
+    snapshots = _hourly_snapshots(lot_rows, reservations, end)
+    _insert_chunked(OccupancySnapshot, snapshots)
+    db.session.commit()
+    log(f'{len(snapshots)} hourly occupancy snapshots')
+    return {'lots': lots, 'spots': spots, 'users': len(user_ids), 'years': years, 'seed': seed,
+            'end': end.isoformat(), 'reservations': len(reservations), 'open': len(open_spots)}
+
+
+def _hourly_snapshots(lot_rows, reservations, end):
+    # Average occupancy per lot and hour over the last SNAPSHOT_DAYS, from the stays
+    # Hours are IST clock hours, as compaction writes them
+    window_start = floor_ist_hour(end - timedelta(days=SNAPSHOT_DAYS))
+    lot_of_spot = {spot_id: lot.id for lot, spot_ids in lot_rows for spot_id in spot_ids}
+    total_of_lot = {lot.id: len(spot_ids) for lot, spot_ids in lot_rows}
+    busy = defaultdict(float)  # (lot_id, hour start) -> occupied spot-seconds
+    for row in reservations:
+        left = row['leaving_timestamp'] or end
+        parked = max(row['parking_timestamp'], window_start)
+        if left <= parked:
+            continue
+        lot_id = lot_of_spot[row['spot_id']]
+        hour = floor_ist_hour(parked)
+        while hour < left:
+            next_hour = hour + timedelta(hours=1)
+            busy[(lot_id, hour)] += (min(left, next_hour) - max(parked, hour)).total_seconds()
+            hour = next_hour
+
+    rows = []
+    hour = window_start
+    while hour < end:
+        for lot_id, total in total_of_lot.items():
+            occupied = busy.get((lot_id, hour), 0) / 3600
+            rows.append({'lot_id': lot_id, 'taken_at': hour, 'resolution': 3600,
+                         'occupied': occupied, 'peak': min(total, math.ceil(occupied)),
+                         'total': total, 'samples': 12})
+        hour += timedelta(hours=1)
+    return rows
@@ -0,0 +1,141 @@
+"""Ways to send requests: the in-process Flask test client or a running server.
+
+Every request is timed into a Recorder under a route label, so the report
+groups /user/vacate_spot/17 and /user/vacate_spot/18 together.
+"""
+import http.cookiejar
+import json
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+CSRF_FIELD = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+
+
+class Recorder:
+    """Latencies (seconds) and error counts per (scenario, route)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.wall_time = {}
+        self.notes = defaultdict(list)
+        self.scenario = None
+
+    def record(self, route, seconds, ok=True):
+        key = (self.scenario, route)
+        with self._lock:
+            self.latencies[key].append(seconds)
+            if not ok:
+                self.errors[key] += 1
+
+    def note(self, text):
+        self.notes[self.scenario].append(text)
+
+    def timed(self, route, fn, *args, **kwargs):
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            self.record(route, time.perf_counter() - started, ok)
+
+
+class Response:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+    @property
+    def text(self):
+        return self.body.decode('utf-8', 'replace')
+
+
+class TestClientSession:
+    def __init__(self, app, recorder):
+        self.client = app.test_client()
+        self.recorder = recorder
+
+    def request(self, route, method, path, headers=None, data=None, json_body=None):
+        started = time.perf_counter()
+        response = self.client.open(path, method=method, headers=headers, data=data, json=json_body)
+        # Reading the body drains streamed responses such as exports
+        body = response.get_data()
+        self.recorder.record(route, time.perf_counter() - started, response.status_code < 500)
+        return Response(response.status_code, response.headers, body)
+
+    def login(self, email, password):
+        return self.request('POST /login', 'POST', '/login', data={'email': email, 'password': password})
+
+
+class HttpSession:
+    def __init__(self, base_url, recorder):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+
+    def request(self, route, method, path, headers=None, data=None, json_body=None):
+        headers = dict(headers or {})
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            body = urllib.parse.urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        started = time.perf_counter()
+        try:
+            with self.opener.open(req) as raw:
+                status, response_headers, content = raw.status, raw.headers, raw.read()
+        except urllib.error.HTTPError as error:
+            status, response_headers, content = error.code, error.headers, error.read()
+        self.recorder.record(route, time.perf_counter() - started, status < 500)
+        return Response(status, response_headers, content)
+
+    def login(self, email, password):
+        # A real server checks the login form's CSRF token
+        page = self.request('GET /login', 'GET', '/login')
+        match = CSRF_FIELD.search(page.text)
+        data = {'email': email, 'password': password}
+        if match:
+            data['csrf_token'] = match.group(1)
+        return self.request('POST /login', 'POST', '/login', data=data)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Report redirects as they are, like the test client does
+    def http_error_302(self, req, fp, code, msg, headers):
+        return fp
+
+    http_error_301 = http_error_303 = http_error_307 = http_error_302
+
+
+class Driver:
+    """Hands out logged-out sessions for the test client or a server URL."""
+
+    def __init__(self, app, recorder, base_url=None):
+        self.app = app
+        self.recorder = recorder
+        self.base_url = base_url
+
+    def session(self):
+        if self.base_url:
+            return HttpSession(self.base_url, self.recorder)
+        return TestClientSession(self.app, self.recorder)
+
+    @property
+    def in_process(self):
+        return self.base_url is None
@@ -0,0 +1,87 @@
+"""Per-route throughput and latency tables, saved as JSON for comparison."""
+import json
+import platform
+import subprocess
+from datetime import datetime
+from profiling import percentile
+
+
+def summarize(recorder):
+    """One row per (scenario, route), latencies in milliseconds."""
+    rows = []
+    for (scenario, route), latencies in sorted(recorder.latencies.items(), key=lambda item: item[0]):
+        wall = recorder.wall_time.get(scenario) or sum(latencies)
+        rows.append({
+            'scenario': scenario,
+            'route': route,
+            'requests': len(latencies),
+            'errors': recorder.errors.get((scenario, route), 0),
+            'throughput': len(latencies) / wall if wall else 0.0,
+            'p50': percentile(latencies, 0.50) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+        })
+    return rows
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(recorder, metadata):
+    return {
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        **metadata,
+        'results': summarize(recorder),
+        'notes': dict(recorder.notes),
+    }
+
+
+def format_report(report, baseline=None):
+    """Plain-text table; with a baseline report, p50/p99 and req/s get a delta column."""
+    before = {(row['scenario'], row['route']): row for row in (baseline or {}).get('results', ())}
+    lines = [f"commit {report.get('commit') or '?'}  {report.get('dialect')}  APP_ENV={report.get('app_env')}  "
+             f"driver={report.get('driver')}  threads={report.get('threads')}  duration={report.get('duration')}s"]
+    if baseline:
+        lines.append(f"baseline commit {baseline.get('commit') or '?'} from {baseline.get('created_at')}")
+
+    header = f"{'route':<58} {'n':>7} {'err':>5} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}"
+    if baseline:
+        header += f" {'Δreq/s':>8} {'Δp50':>8} {'Δp99':>8}"
+    scenario = None
+    for row in report['results']:
+        if row['scenario'] != scenario:
+            scenario = row['scenario']
+            lines += ['', f'== {scenario}', header]
+        line = (f"{row['route'][:58]:<58} {row['requests']:>7} {row['errors']:>5} "
+                f"{row['throughput']:>9.1f} {row['p50']:>9.2f} {row['p99']:>9.2f}")
+        old = before.get((row['scenario'], row['route']))
+        if old:
+            line += (f" {_change(row['throughput'], old['throughput']):>8} "
+                     f"{_change(row['p50'], old['p50']):>8} {_change(row['p99'], old['p99']):>8}")
+        lines.append(line)
+
+    for scenario, notes in report.get('notes', {}).items():
+        lines += ['', f'-- {scenario}'] + [f'   {note}' for note in notes]
+    return '\n'.join(lines)
+
+
+def _change(new, old):
+    if not old:
+        return '-'
+    return f'{(new - old) / old * 100:+.0f}%'
+
+
+def save(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
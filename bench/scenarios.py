@@ -0,0 +1,488 @@
+"""Benchmark scenarios. Each takes a Context and records into ctx.recorder.
+
+Request scenarios go through ctx.driver (test client or live server);
+the engine, micro and SQL scenarios call the app's modules directly and
+always run in process.
+"""
+import html
+import multiprocessing
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from pytz import timezone
+from sqlalchemy import select, func, text
+from models import db, User, ParkingLot, ParkingSpot, Reservation
+from bench.datagen import BENCH_PASSWORD
+
+NEXT_PAGE = re.compile(r'href="(/admin/parking_history\?cursor=[^"]+)"')
+
+# Upper bounds on SQL statements per request, checked by query_budgets
+QUERY_BUDGETS = {
+    '/admin/dashboard': 5,
+    '/admin/users': 2,
+    '/admin/occupied_spots': 3,
+    '/admin/parking_history': 2,
+    '/admin/parking_lots': 4,
+    '/api/parking-lots': 2,
+    # The lots' version stamp, then lot counts and revenue on a miss
+    '/api/parking_stats': 3,
+    '/user/dashboard': 2,
+}
+
+SCENARIOS = {}
+
+
+def scenario(fn):
+    SCENARIOS[fn.__name__] = fn
+    return fn
+
+
+class Context:
+    def __init__(self, app, driver, recorder, threads=8, duration=10.0, seed=42):
+        self.app = app
+        self.driver = driver
+        self.recorder = recorder
+        self.threads = threads
+        self.duration = duration
+        self.seed = seed
+        with app.app_context():
+            self.lot_ids = db.session.scalars(select(ParkingLot.id).order_by(ParkingLot.id)).all()
+            busy = select(Reservation.user_id).where(Reservation.leaving_timestamp.is_(None))
+            self.free_users = db.session.scalars(
+                select(User.email)
+                .where(User.email.like('bench-user-%'), User.id.not_in(busy))
+                .order_by(User.id)
+            ).all()
+        self.admin_email = os.environ.get('ADMIN_EMAIL', 'admin@parkease.com')
+        self.admin_password = os.environ.get('ADMIN_PASSWORD', 'admin123')
+
+    def admin_session(self):
+        session = self.driver.session()
+        session.login(self.admin_email, self.admin_password)
+        return session
+
+    def user_session(self, email):
+        session = self.driver.session()
+        session.login(email, BENCH_PASSWORD)
+        return session
+
+
+def run_threads(ctx, count, setup, body):
+    """Run body(index, state, deadline) on count threads for ctx.duration.
+
+    setup(index) runs first on every thread (logins are slow on purpose) and
+    its result is passed to body; the clock starts once all threads are set up.
+    """
+    ready = threading.Barrier(count + 1)
+    window = {}
+
+    def run(index):
+        try:
+            state = setup(index)
+        except Exception:
+            ready.abort()
+            raise
+        ready.wait()
+        body(index, state, window['deadline'])
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    window['deadline'] = time.monotonic() + ctx.duration
+    started = time.perf_counter()
+    ready.wait()
+    for thread in threads:
+        thread.join()
+    ctx.recorder.wall_time[ctx.recorder.scenario] = time.perf_counter() - started
+
+
+def _book_and_vacate(ctx, session, rng, lot_id, outcomes):
+    response = session.request('POST /api/book-parking', 'POST', '/api/book-parking',
+                               json_body={'lot_id': lot_id, 'vehicle_number': f'BN{rng.randrange(10000):04d}'})
+    payload = response.json() if response.status == 200 else {}
+    if not payload.get('success'):
+        outcomes[payload.get('message', f'HTTP {response.status}')] += 1
+        return
+    outcomes['booked'] += 1
+    session.request('GET /api/check-active-booking', 'GET', '/api/check-active-booking')
+    reservation_id = payload['data']['reservation_id']
+    session.request('POST /user/vacate_spot/<id>', 'POST', f'/user/vacate_spot/{reservation_id}')
+
+
+@scenario
+def booking_rush(ctx):
+    """Many users booking and vacating at once, most of them in one hot lot.
+
+    Afterwards checks that no spot or user holds two open reservations and
+    that the lot counters still match the spot statuses.
+    """
+    from collections import Counter
+    if not ctx.lot_ids or len(ctx.free_users) < ctx.threads:
+        ctx.recorder.note('skipped: needs lots and one free bench user per thread')
+        return
+    hot_lot = ctx.lot_ids[0]
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def body(index, session, deadline):
+        rng = random.Random(ctx.seed + index)
+        local = Counter()
+        while time.monotonic() < deadline:
+            lot_id = hot_lot if rng.random() < 0.7 else rng.choice(ctx.lot_ids)
+            _book_and_vacate(ctx, session, rng, lot_id, local)
+        with lock:
+            outcomes.update(local)
+
+    run_threads(ctx, ctx.threads, lambda index: ctx.user_session(ctx.free_users[index]), body)
+    ctx.recorder.note('outcomes: ' + ', '.join(f'{key}={count}' for key, count in outcomes.most_common()))
+    for check in double_booking_checks(ctx.app):
+        ctx.recorder.note(check)
+
+
+def double_booking_checks(app):
+    """Invariant checks on the booking tables, as 'PASS ...' / 'FAIL ...' lines."""
+    with app.app_context():
+        open_reservations = select(Reservation.spot_id, Reservation.user_id).where(
+            Reservation.leaving_timestamp.is_(None)).subquery()
+        spots_twice = db.session.execute(
+            select(func.count()).select_from(
+                select(open_reservations.c.spot_id).group_by(open_reservations.c.spot_id)
+                .having(func.count() > 1).subquery())
+        ).scalar()
+        users_twice = db.session.execute(
+            select(func.count()).select_from(
+                select(open_reservations.c.user_id).group_by(open_reservations.c.user_id)
+                .having(func.count() > 1).subquery())
+        ).scalar()
+        status_mismatch = db.session.execute(
+            select(func.count()).select_from(ParkingSpot)
+            .outerjoin(open_reservations, open_reservations.c.spot_id == ParkingSpot.id)
+            .where((ParkingSpot.status == 'O') != open_reservations.c.spot_id.isnot(None))
+        ).scalar()
+        occupied = select(ParkingSpot.lot_id, func.count().label('n')).where(
+            ParkingSpot.status == 'O').group_by(ParkingSpot.lot_id).subquery()
+        counter_mismatch = db.session.execute(
+            select(func.count()).select_from(ParkingLot)
+            .outerjoin(occupied, occupied.c.lot_id == ParkingLot.id)
+            .where(ParkingLot.occupied_spots != func.coalesce(occupied.c.n, 0))
+        ).scalar()
+    checks = [('spots with two open reservations', spots_twice),
+              ('users with two open reservations', users_twice),
+              ('spot statuses not matching open reservations', status_mismatch),
+              ('lots whose occupied counter is off', counter_mismatch)]
+    return [f'{"PASS" if count == 0 else "FAIL"} {label}: {count}' for label, count in checks]
+
+
+@scenario
+def dashboard_polling(ctx):
+    """Admins polling the dashboard and JSON APIs while one user books and vacates."""
+    if not ctx.lot_ids:
+        ctx.recorder.note('skipped: no lots')
+        return
+
+    def poller(index, session, deadline):
+        rng = random.Random(ctx.seed + index)
+        etags = {}
+        while time.monotonic() < deadline:
+            lot_id = rng.choice(ctx.lot_ids)
+            session.request('GET /admin/dashboard', 'GET', '/admin/dashboard')
+            session.request('GET /admin/parking_stats', 'GET', '/admin/parking_stats')
+            session.request('GET /api/parking_stats', 'GET', '/api/parking_stats')
+            for route, path in (('GET /api/parking-lots', '/api/parking-lots'),
+                                ('GET /api/parking_lot/<id>/spots?format=bitmap',
+                                 f'/api/parking_lot/{lot_id}/spots?format=bitmap')):
+                headers = {'If-None-Match': etags[path]} if path in etags else None
+                response = session.request(route, 'GET', path, headers=headers)
+                if response.headers.get('ETag'):
+                    etags[path] = response.headers['ETag']
+                if route.endswith('bitmap') and response.status == 200:
+                    version = response.json()['data']['version']
+                    session.request('GET /api/parking_lot/<id>/spots/changes', 'GET',
+                                    f'/api/parking_lot/{lot_id}/spots/changes?since={version}')
+
+    def writer(session, deadline):
+        from collections import Counter
+        rng = random.Random(ctx.seed)
+        while time.monotonic() < deadline:
+            _book_and_vacate(ctx, session, rng, rng.choice(ctx.lot_ids), Counter())
+            time.sleep(0.05)
+
+    def setup(index):
+        if index == 0:
+            return ctx.user_session(ctx.free_users[-1]) if ctx.free_users else None
+        return ctx.admin_session()
+
+    def body(index, session, deadline):
+        if index > 0:
+            poller(index, session, deadline)
+        elif session is not None:
+            writer(session, deadline)
+
+    run_threads(ctx, max(2, ctx.threads), setup, body)
+
+
+@scenario
+def history_export(ctx):
+    """Paging through parking history and exporting it as CSV and NDJSON."""
+    session = ctx.admin_session()
+    rng = random.Random(ctx.seed)
+    with ctx.app.app_context():
+        latest = db.session.execute(select(func.max(Reservation.parking_timestamp))).scalar() or datetime.utcnow()
+    month, year = latest.month, latest.year
+    date_from = (latest - timedelta(days=7)).strftime('%Y-%m-%d')
+
+    started = time.perf_counter()
+    deadline = time.monotonic() + ctx.duration
+    while time.monotonic() < deadline:
+        page = session.request('GET /admin/parking_history', 'GET', '/admin/parking_history')
+        for _ in range(3):
+            match = NEXT_PAGE.search(page.text)
+            if not match:
+                break
+            page = session.request('GET /admin/parking_history?cursor', 'GET', html.unescape(match.group(1)))
+        lot_id = rng.choice(ctx.lot_ids) if ctx.lot_ids else ''
+        session.request('GET /admin/parking_history?lot_id&month&year', 'GET',
+                        f'/admin/parking_history?lot_id={lot_id}&month={month}&year={year}')
+        session.request('GET /admin/parking_history/export?format=csv (7 days)', 'GET',
+                        f'/admin/parking_history/export?format=csv&date_from={date_from}')
+        session.request('GET /admin/parking_history/export?format=ndjson (month)', 'GET',
+                        f'/admin/parking_history/export?format=ndjson&month={month}&year={year}')
+    # One unfiltered export: the whole table, streamed
+    session.request('GET /admin/parking_history/export?format=csv (all)', 'GET',
+                    '/admin/parking_history/export?format=csv')
+    ctx.recorder.wall_time[ctx.recorder.scenario] = time.perf_counter() - started
+
+
+@scenario
+def query_budgets(ctx):
+    """Run each page once and compare its SQL statement count with QUERY_BUDGETS."""
+    if not ctx.driver.in_process:
+        ctx.recorder.note('skipped: query counting needs the in-process test client')
+        return
+    from profiling import count_queries
+    admin = ctx.admin_session()
+    user = ctx.user_session(ctx.free_users[0]) if ctx.free_users else None
+    # Count steady-state requests: the first one after login also loads the user
+    admin.request('GET /admin/dashboard (warm-up)', 'GET', '/admin/dashboard')
+    if user is not None:
+        user.request('GET /user/dashboard (warm-up)', 'GET', '/user/dashboard')
+    for path, budget in QUERY_BUDGETS.items():
+        session = user if path.startswith('/user') else admin
+        if session is None:
+            continue
+        with count_queries() as statements:
+            session.request(f'GET {path}', 'GET', path)
+        verdict = 'PASS' if len(statements) <= budget else 'FAIL'
+        ctx.recorder.note(f'{verdict} {path}: {len(statements)} queries (budget {budget})')
+
+
+def _contention_worker(emails, lot_ids, seconds, seed, queue):
+    from app import app
+    from booking import reserve_spot, release_reservation, BookingError
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def run(index, email):
+        nonlocal errors
+        rng = random.Random(seed + index)
+        with app.app_context():
+            user_id = db.session.execute(select(User.id).where(User.email == email)).scalar()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    reservation = reserve_spot(user_id, 'BENCH', lot_id=rng.choice(lot_ids))
+                    release_reservation(reservation)
+                    with lock:
+                        latencies.append(time.perf_counter() - started)
+                except BookingError:
+                    pass
+                except Exception:
+                    # e.g. "database is locked" once busy_timeout runs out
+                    db.session.rollback()
+                    with lock:
+                        errors += 1
+
+    threads = [threading.Thread(target=run, args=(i, email)) for i, email in enumerate(emails)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    queue.put((latencies, errors))
+
+
+@scenario
+def write_contention(ctx, processes=4):
+    """Booking engine hammered from several processes, like gunicorn workers.
+
+    Run it under APP_ENV=development and APP_ENV=production to compare the
+    SQLite tuning of the two profiles.
+    """
+    per_process = max(1, ctx.threads)
+    emails = ctx.free_users[:processes * per_process]
+    if len(emails) < processes or not ctx.lot_ids:
+        ctx.recorder.note('skipped: needs lots and free bench users')
+        return
+    queue = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_contention_worker,
+                                       args=(emails[i::processes], ctx.lot_ids, ctx.duration, ctx.seed + 1000 * i, queue))
+               for i in range(processes)]
+    for worker in workers:
+        worker.start()
+    results = [queue.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    errors = 0
+    for latencies, worker_errors in results:
+        for seconds in latencies:
+            ctx.recorder.record('engine: book + release', seconds)
+        errors += worker_errors
+    ctx.recorder.note(f'{processes} processes x {per_process} threads, APP_ENV={os.environ.get("APP_ENV", "development")}, '
+                      f'{errors} failed transactions')
+
+
+def _original_utc_to_ist(utc_dt):
+    # utils.utc_to_ist as it was before format_ist_datetimes, kept as the
+    # baseline: the current one is itself faster, which would hide the gain
+    if utc_dt is None:
+        return None
+    if utc_dt.tzinfo is None:
+        utc_dt = timezone('UTC').localize(utc_dt)
+    ist = timezone('Asia/Kolkata')
+    return utc_dt.astimezone(ist)
+
+
+@scenario
+def ist_formatting(ctx, rows=10000, rounds=10):
+    """format_ist_datetimes against the original per-row pytz conversion on one column of timestamps."""
+    from utils import format_ist_datetimes
+    rng = random.Random(ctx.seed)
+    base = datetime(2024, 1, 1)
+    column = [base + timedelta(seconds=rng.randrange(3 * 365 * 86400)) for _ in range(rows)]
+    for _ in range(rounds):
+        ctx.recorder.timed(f'original utc_to_ist + strftime x{rows}',
+                           lambda: [_original_utc_to_ist(dt).strftime('%Y-%m-%d %H:%M') for dt in column])
+        ctx.recorder.timed(f'format_ist_datetimes x{rows}', format_ist_datetimes, column)
+
+
+@scenario
+def bulk_provisioning(ctx, spots=10000, rounds=3):
+    """Creating and shrinking a large lot with the bulk spot helpers."""
+    from lot_capacity import add_spots, remove_free_spots
+    with ctx.app.app_context():
+        for _ in range(rounds):
+            lot = ParkingLot(prime_location_name='Bench Provisioning', price=10, address='-',
+                             pincode=400000, max_spots=spots, total_spots=0)
+            db.session.add(lot)
+            db.session.flush()
+            ctx.recorder.timed(f'add_spots x{spots}', lambda: (add_spots(lot, spots), db.session.commit()))
+            ctx.recorder.timed(f'remove_free_spots x{spots}', lambda: (remove_free_spots(lot, spots), db.session.commit()))
+            db.session.delete(lot)
+            db.session.commit()
+
+
+# Hot statements with the parameters they are usually run with
+HOT_QUERIES = {
+    'free spot of a lot': lambda ids: select(ParkingSpot.id).where(
+        ParkingSpot.lot_id == ids['lot'], ParkingSpot.status == 'A').order_by(ParkingSpot.id).limit(1),
+    'open reservation of a user': lambda ids: select(Reservation.id).where(
+        Reservation.user_id == ids['user'], Reservation.leaving_timestamp.is_(None)),
+    'user history newest first': lambda ids: select(Reservation).where(
+        Reservation.user_id == ids['user']).order_by(Reservation.parking_timestamp.desc()).limit(20),
+    'history keyset page': lambda ids: select(Reservation).where(
+        Reservation.parking_timestamp < ids['recent']).order_by(
+        Reservation.parking_timestamp.desc(), Reservation.id.desc()).limit(50),
+    'revenue closed in a day': lambda ids: select(func.sum(Reservation.parking_cost)).where(
+        Reservation.leaving_timestamp >= ids['recent'] - timedelta(days=1),
+        Reservation.leaving_timestamp < ids['recent']),
+    'occupied spots with reservation': lambda ids: select(ParkingSpot.id, Reservation.id).join(
+        Reservation, Reservation.spot_id == ParkingSpot.id).where(
+        ParkingSpot.status == 'O', Reservation.leaving_timestamp.is_(None)),
+}
+
+
+# Indexes added for the hot statements; index_plans times each query
+# with and without them
+HOT_INDEXES = (
+    'ix_parking_spots_lot_status',
+    'ix_reservations_left',
+    'ix_reservations_open_spot',
+    'ix_reservations_parked',
+    'ix_reservations_spot_left',
+    'ix_reservations_user_left',
+    'ix_reservations_user_parked',
+)
+
+
+def _query_plan(statement):
+    dialect = db.engine.dialect
+    compiled = statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True})
+    explain = 'EXPLAIN QUERY PLAN ' if dialect.name == 'sqlite' else 'EXPLAIN '
+    return [str(row[-1]).strip() for row in db.session.execute(text(explain + str(compiled)))]
+
+
+def _measure_hot_queries(ctx, ids, label, repeats):
+    """Plan and median time of every hot query; returns {name: median seconds}."""
+    from profiling import percentile
+    medians = {}
+    for name, build in HOT_QUERIES.items():
+        statement = build(ids)
+        plan = _query_plan(statement)
+        scans = [line for line in plan if re.match(r'SCAN (reservations|parking_spots)\b', line)
+                 or 'Seq Scan on reservations' in line or 'Seq Scan on parking_spots' in line]
+        if label == 'indexed':
+            ctx.recorder.note(f'{"FAIL" if scans else "PASS"} {name}: ' + ' / '.join(plan))
+        else:
+            ctx.recorder.note(f'---- {name} ({label}): ' + ' / '.join(plan))
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            db.session.execute(statement).all()
+            timings.append(time.perf_counter() - started)
+            ctx.recorder.record(f'sql: {name} ({label})', timings[-1])
+        medians[name] = percentile(timings, 0.5)
+        db.session.rollback()
+    return medians
+
+
+@scenario
+def index_plans(ctx, repeats=20):
+    """Query plans and timings of the hot statements, with and without their indexes.
+
+    The indexes are dropped for the second pass and created again afterwards,
+    so run it against a copy (the default) rather than a live database.
+    """
+    indexes = [index for table in (ParkingSpot.__table__, Reservation.__table__)
+               for index in table.indexes if index.name in HOT_INDEXES]
+    with ctx.app.app_context():
+        ids = {
+            'lot': ctx.lot_ids[0] if ctx.lot_ids else 0,
+            'user': db.session.execute(select(func.min(Reservation.user_id))).scalar() or 0,
+            'recent': db.session.execute(select(func.max(Reservation.parking_timestamp))).scalar() or datetime.utcnow(),
+        }
+        rows = db.session.execute(select(func.count()).select_from(Reservation)).scalar()
+        ctx.recorder.note(f'{rows} reservations')
+        indexed = _measure_hot_queries(ctx, ids, 'indexed', repeats)
+
+        db.session.remove()
+        with db.engine.begin() as conn:
+            for index in indexes:
+                index.drop(conn)
+        # SQLite keeps prepared EXPLAINs per connection; start from fresh ones
+        db.engine.dispose()
+        try:
+            unindexed = _measure_hot_queries(ctx, ids, 'no indexes', repeats)
+        finally:
+            db.session.remove()
+            with db.engine.begin() as conn:
+                for index in indexes:
+                    index.create(conn)
+            db.engine.dispose()
+
+        for name in HOT_QUERIES:
+            before, after = unindexed[name] * 1000, indexed[name] * 1000
+            speedup = f'{before / after:.1f}x' if after else '-'
+            ctx.recorder.note(f'{name}: {before:.2f} ms without indexes, {after:.2f} ms with ({speedup})')
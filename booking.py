@@ -0,0 +1,174 @@
+import time
+from datetime import datetime
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from models import db, User, ParkingLot, ParkingSpot, Reservation
+from spot_allocator import spot_allocator
+from events import availability_hub
+from cache import cache, user_tag
+from spot_grid import record_change
+from revenue import record_release
+from metrics import BOOKINGS, BOOKING_FAILURES, OPERATION_LATENCY
+
+
+class BookingError(Exception):
+    """Raised when a booking or release cannot go through; the message is user-facing."""
+
+
+def _refused(reason, message):
+    BOOKING_FAILURES.inc(reason=reason)
+    return BookingError(message)
+
+
+def _claim_spot(spot_id):
+    # Conditional UPDATE: only one transaction can flip a given spot from A to O,
+    # no matter how many threads or worker processes race for it.
+    result = db.session.execute(
+        update(ParkingSpot)
+        .where(ParkingSpot.id == spot_id, ParkingSpot.status == 'A')
+        .values(status='O')
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def _adjust_occupied(lot_id, delta):
+    # Also bumps the lot's version, which the live feed watches. Returns the
+    # new version for the spot change log.
+    return db.session.execute(
+        update(ParkingLot)
+        .where(ParkingLot.id == lot_id)
+        .values(occupied_spots=ParkingLot.occupied_spots + delta, version=ParkingLot.version + 1)
+        .returning(ParkingLot.version)
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
+
+
+def _adjust_user_totals(user_id, bookings=0, spent=0):
+    # The admin user list sorts on these; also bumps the user's version for
+    # the reservation ETags.
+    db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(total_bookings=User.total_bookings + bookings,
+                total_spent=User.total_spent + spent,
+                version=User.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _claim_next_free(lot_id):
+    while True:
+        spot_id = spot_allocator.claim(lot_id)
+        if spot_id is None:
+            break
+        if _claim_spot(spot_id):
+            return spot_id
+
+    # The free-list is per process, so another worker may have released spots
+    # this one has not seen. Fall back to the database before giving up.
+    # On PostgreSQL, SKIP LOCKED lets concurrent bookers each lock a different
+    # free row instead of queueing on the same one; SQLite ignores it.
+    while True:
+        spot_id = db.session.query(ParkingSpot.id).filter(
+            ParkingSpot.lot_id == lot_id,
+            ParkingSpot.status == 'A'
+        ).order_by(ParkingSpot.id).limit(1).with_for_update(skip_locked=True).scalar()
+        if spot_id is None:
+            return None
+        if _claim_spot(spot_id):
+            spot_allocator.rebuild(lot_id)
+            return spot_id
+
+
+def reserve_spot(user_id, vehicle_number, spot_id=None, lot_id=None):
+    """Claim a spot and open a reservation for the user in a single transaction.
+
+    Pass spot_id to book that exact spot, or lot_id to get the next free spot
+    of the lot. Returns the new Reservation.
+    """
+    started = time.perf_counter()
+    mode = 'lot' if spot_id is None else 'spot'
+    if spot_id is not None:
+        spot = db.session.get(ParkingSpot, spot_id)
+        if not spot:
+            raise _refused('invalid_spot', 'Invalid spot')
+        lot_id = spot.lot_id
+        spot_allocator.claim(lot_id, spot_id)
+        if not _claim_spot(spot_id):
+            db.session.rollback()
+            raise _refused('spot_taken', 'Spot is not available')
+    else:
+        spot_id = _claim_next_free(lot_id)
+        if spot_id is None:
+            db.session.rollback()
+            raise _refused('lot_full', 'No available spots at this parking lot.')
+    version = _adjust_occupied(lot_id, 1)
+    record_change(lot_id, version, spot_id, 'O')
+    _adjust_user_totals(user_id, bookings=1)
+
+    reservation = Reservation(
+        user_id=user_id,
+        spot_id=spot_id,
+        parking_timestamp=datetime.utcnow(),
+        vehicle_number=vehicle_number
+    )
+    # Added last: the insert is what trips the one-open-reservation index,
+    # and it must only be flushed inside the try below.
+    db.session.add(reservation)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # ix_reservations_open_user allows one open reservation per user; the
+        # spot claim is rolled back with it.
+        db.session.rollback()
+        spot_allocator.release(lot_id, spot_id)
+        raise _refused('active_booking', 'You already have an active booking')
+    cache.invalidate_lot(lot_id)
+    cache.invalidate(user_tag(user_id))
+    availability_hub.notify()
+    BOOKINGS.inc(mode=mode)
+    OPERATION_LATENCY.observe(time.perf_counter() - started, operation='book')
+    return reservation
+
+
+def release_reservation(reservation, force_released=False):
+    """Close an open reservation, bill it and free its spot.
+
+    Returns (leaving_timestamp, hours, parking_cost).
+    """
+    started = time.perf_counter()
+    spot = db.session.get(ParkingSpot, reservation.spot_id)
+    if not spot:
+        raise BookingError('Spot not found')
+
+    now = datetime.utcnow()
+    duration = now - reservation.parking_timestamp
+    hours = duration.total_seconds() / 3600
+    parking_cost = round(hours * spot.parking_lot.price, 2)
+
+    result = db.session.execute(
+        update(Reservation)
+        .where(Reservation.id == reservation.id, Reservation.leaving_timestamp.is_(None))
+        .values(leaving_timestamp=now, parking_cost=parking_cost, force_released=force_released)
+    )
+    if result.rowcount != 1:
+        db.session.rollback()
+        raise BookingError('Spot already vacated')
+
+    db.session.execute(
+        update(ParkingSpot)
+        .where(ParkingSpot.id == spot.id)
+        .values(status='A')
+    )
+    version = _adjust_occupied(spot.lot_id, -1)
+    record_change(spot.lot_id, version, spot.id, 'A')
+    record_release(spot.lot_id, now, parking_cost)
+    _adjust_user_totals(reservation.user_id, spent=parking_cost)
+    db.session.commit()
+    spot_allocator.release(spot.lot_id, spot.id)
+    cache.invalidate_lot(spot.lot_id)
+    cache.invalidate(user_tag(reservation.user_id))
+    availability_hub.notify()
+    OPERATION_LATENCY.observe(time.perf_counter() - started, operation='release')
+    return now, hours, parking_cost
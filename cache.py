@@ -0,0 +1,239 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Tag for entries built from every lot (lot lists, totals, stats). Any change
+# to a single lot invalidates it together with that lot's own tag.
+LOTS_TAG = 'lots'
+
+# Tag for entries that show lot names or prices but not occupancy, such as a
+# user's booking history. Only lot edits and deletions invalidate it.
+LOT_DETAILS_TAG = 'lot_details'
+
+
+def lot_tag(lot_id):
+    return f'lot:{lot_id}'
+
+
+def user_tag(user_id):
+    return f'user:{user_id}'
+
+
+class MemoryBackend:
+    """LRU with per-entry expiry, private to this process."""
+
+    def __init__(self, max_entries=1024):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._max_entries = max_entries
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, tags = entry
+            if expires_at <= time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl, tags):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, time.monotonic() + ttl, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self._max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def size(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _drop(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class SQLiteBackend:
+    """Cache kept in a SQLite file so every worker process shares entries and invalidations.
+
+    Values are stored as JSON, so only JSON-serialisable data can be cached.
+    """
+
+    def __init__(self, path, max_entries=1024):
+        self._path = path
+        self._max_entries = max_entries
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_entries ('
+                         'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_tags ('
+                         'tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key))')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_cache_tags_key ON cache_tags (key)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?',
+            (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl, tags):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)',
+                         (key, json.dumps(value), time.time() + ttl))
+            conn.execute('DELETE FROM cache_tags WHERE key = ?', (key,))
+            conn.executemany('INSERT INTO cache_tags (tag, key) VALUES (?, ?)', [(tag, key) for tag in tags])
+            self._evict(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def invalidate(self, tags):
+        conn = self._connect()
+        placeholders = ', '.join('?' for _ in tags)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(f'DELETE FROM cache_entries WHERE key IN '
+                         f'(SELECT key FROM cache_tags WHERE tag IN ({placeholders}))', tags)
+            conn.execute('DELETE FROM cache_tags WHERE key NOT IN (SELECT key FROM cache_entries)')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute('DELETE FROM cache_entries')
+        conn.execute('DELETE FROM cache_tags')
+
+    def size(self):
+        return self._connect().execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+
+    def _evict(self, conn):
+        conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (time.time(),))
+        overflow = conn.execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0] - self._max_entries
+        if overflow > 0:
+            conn.execute('DELETE FROM cache_entries WHERE key IN '
+                         '(SELECT key FROM cache_entries ORDER BY expires_at LIMIT ?)', (overflow,))
+        conn.execute('DELETE FROM cache_tags WHERE key NOT IN (SELECT key FROM cache_entries)')
+
+
+class ResponseCache:
+    """Tagged read-through cache for the read-heavy pages and API endpoints.
+
+    Entries expire after a TTL, but the write paths (booking, release, lot
+    edits) invalidate the tags they touch as soon as they commit, so the TTL
+    only bounds staleness from writes that bypass them. Configure with
+    CACHE_BACKEND ('memory', 'sqlite' or 'null'), CACHE_DEFAULT_TTL,
+    CACHE_MAX_ENTRIES and CACHE_SQLITE_PATH.
+    """
+
+    def __init__(self):
+        self.backend = MemoryBackend()
+        self.default_ttl = 30
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        backend = app.config.get('CACHE_BACKEND', 'memory')
+        max_entries = app.config.get('CACHE_MAX_ENTRIES', 1024)
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 30)
+        if backend == 'memory':
+            self.backend = MemoryBackend(max_entries)
+        elif backend == 'sqlite':
+            path = app.config.get('CACHE_SQLITE_PATH') or os.path.join(app.instance_path, 'cache.db')
+            self.backend = SQLiteBackend(path, max_entries)
+        elif backend == 'null':
+            self.backend = None
+        else:
+            raise ValueError(f'Unknown CACHE_BACKEND {backend!r}')
+
+    def get_or_set(self, key, producer, ttl=None, tags=()):
+        """Return the cached value for key, calling producer() to fill it on a miss."""
+        if self.backend is None:
+            return producer()
+        value = self.backend.get(key)
+        if value is not None:
+            self._count(hit=True)
+            return value
+        self._count(hit=False)
+        value = producer()
+        self.backend.set(key, value, self.default_ttl if ttl is None else ttl, tuple(tags))
+        return value
+
+    def invalidate(self, *tags):
+        if self.backend is not None and tags:
+            self.backend.invalidate(tags)
+
+    def invalidate_lot(self, lot_id, details=False):
+        """Drop everything built from this lot's counts; details=True also drops
+        entries that only show its name or price."""
+        if details:
+            self.invalidate(LOTS_TAG, lot_tag(lot_id), LOT_DETAILS_TAG)
+        else:
+            self.invalidate(LOTS_TAG, lot_tag(lot_id))
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        """Hit/miss counters for this process plus the backend's current size."""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'backend': type(self.backend).__name__ if self.backend else 'null',
+            'entries': self.backend.size() if self.backend else 0,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': (hits / lookups) if lookups else 0
+        }
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+cache = ResponseCache()
@@ -0,0 +1,77 @@
+import os
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Dialects whose insert() supports ON CONFLICT DO UPDATE / DO NOTHING
+ON_CONFLICT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run the given PRAGMAs on every new connection the engine opens.
+
+    Does nothing for non-SQLite engines or an empty pragma dict.
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def dispose_pool_after_fork(engine):
+    """Give forked worker processes their own connections.
+
+    A pool inherited across fork (e.g. gunicorn --preload) would share the
+    parent's sockets between processes. close=False leaves the parent's
+    connections alone while the child starts an empty pool.
+    """
+    os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+
+
+def require_returning(engine):
+    """Refuse to run on a database without UPDATE/INSERT ... RETURNING.
+
+    The booking engine and the lot resize helpers read back what they wrote
+    in the same statement. SQLite 3.35+ and PostgreSQL support that; MySQL
+    does not, and would fail on the first booking instead of at startup.
+    """
+    # SQLite only knows its capabilities once it has seen the server version
+    with engine.connect():
+        pass
+    dialect = engine.dialect
+    if not (dialect.update_returning and dialect.insert_executemany_returning):
+        version = '.'.join(str(part) for part in dialect.server_version_info or ())
+        raise RuntimeError(f'{dialect.name} {version} does not support UPDATE ... RETURNING; '
+                           'use PostgreSQL or SQLite 3.35 or newer')
+
+
+def on_conflict_insert(engine):
+    """The engine dialect's insert() construct with ON CONFLICT support, or None."""
+    return ON_CONFLICT_INSERTS.get(engine.dialect.name)
+
+
+def schema_state(engine, migrations_dir):
+    """Where the database stands against the migrations in migrations_dir.
+
+    'empty' when it has no tables yet, 'current' when alembic has it at the
+    latest revision, and 'behind' otherwise, including a database created
+    before migrations existed (tables but no alembic_version).
+    """
+    with engine.connect() as connection:
+        if not inspect(connection).get_table_names():
+            return 'empty'
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    heads = set(ScriptDirectory(migrations_dir).get_heads())
+    return 'current' if current == heads else 'behind'
+
+
+def stamp_head(engine, migrations_dir):
+    """Record a database just built by create_all() as being at the latest migration."""
+    with engine.begin() as connection:
+        MigrationContext.configure(connection).stamp(ScriptDirectory(migrations_dir), 'heads')
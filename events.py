@@ -0,0 +1,211 @@
+import json
+import os
+import queue
+import threading
+from sqlalchemy import select
+from models import db, ParkingLot
+from versions import lot_list_stamp
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Subscriber:
+    """One stream's queue of formatted SSE messages.
+
+    If the stream falls SUBSCRIBER_QUEUE_SIZE messages behind, further
+    messages are dropped and `lagging` is set; the stream then starts over
+    from the hub's in-memory snapshot instead of showing stale lots.
+    """
+
+    def __init__(self, queue_size):
+        self.messages = queue.Queue(maxsize=queue_size)
+        self.lagging = False
+
+    def put(self, message):
+        try:
+            self.messages.put_nowait(message)
+        except queue.Full:
+            self.lagging = True
+
+    def get(self, timeout):
+        """The next message, or None after timeout seconds."""
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def resync(self):
+        while True:
+            try:
+                self.messages.get_nowait()
+            except queue.Empty:
+                break
+        self.lagging = False
+
+
+class EventHub:
+    """In-process pub/sub for the live availability feed.
+
+    The process's AvailabilityWatcher reads the lots and publishes the ones
+    that changed; publish() formats the SSE message once and hands the same
+    string to every subscriber's queue, so fanning out costs no database
+    work per client. The hub also keeps the latest state of every lot, which
+    is what a new stream starts from.
+    """
+
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self._lock = threading.Condition()
+        self._subscribers = set()
+        self._queue_size = queue_size
+        # {lot_id: lot_event_data}; None until the watcher has read the lots
+        # for the current subscribers
+        self._lots = None
+        self._wakeup = threading.Event()
+
+    def subscribe(self, limit):
+        """A new Subscriber, or None if limit subscribers are already open."""
+        subscriber = Subscriber(self._queue_size)
+        with self._lock:
+            if len(self._subscribers) >= limit:
+                return None
+            self._subscribers.add(subscriber)
+            if self._lots is not None:
+                subscriber.put(format_event('snapshot', list(self._lots.values())))
+            self._lock.notify_all()
+        # Without a snapshot yet the watcher reads the lots straight away
+        self._wakeup.set()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+            if not self._subscribers:
+                # Nobody is watching, so the watcher stops reading and the
+                # state goes stale; the next subscriber waits for a fresh read.
+                self._lots = None
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def snapshot(self):
+        """Every lot's latest availability as a list, or None if it is not known."""
+        with self._lock:
+            return None if self._lots is None else list(self._lots.values())
+
+    def publish(self, lots):
+        """Take the watcher's fresh {lot_id: lot_event_data} and fan out what changed.
+
+        Subscribers that have no snapshot yet get the whole list; the others
+        get a 'lots' event with the changed lots, and removed lots as
+        {'lot_id': id, 'removed': True}.
+        """
+        with self._lock:
+            previous = self._lots
+            self._lots = lots
+            subscribers = list(self._subscribers)
+        snapshot = format_event('snapshot', list(lots.values()))
+        if previous is None:
+            changes = None
+        else:
+            changed = [data for lot_id, data in lots.items() if previous.get(lot_id) != data]
+            changed += [{'lot_id': lot_id, 'removed': True} for lot_id in previous if lot_id not in lots]
+            changes = format_event('lots', changed) if changed else None
+        for subscriber in subscribers:
+            if previous is None:
+                subscriber.put(snapshot)
+            elif changes:
+                subscriber.put(changes)
+
+    def notify(self):
+        """Ask the watcher to read the lots now instead of at its next poll.
+
+        Called after a commit that changed a lot's counts in this process.
+        """
+        self._wakeup.set()
+
+    def wait_for_subscribers(self):
+        """Block while nobody is subscribed. True if it had to wait."""
+        with self._lock:
+            if self._subscribers:
+                return False
+            self._lock.wait_for(lambda: self._subscribers)
+            return True
+
+    def wait_for_change(self, timeout):
+        self._wakeup.wait(timeout)
+        self._wakeup.clear()
+
+
+class AvailabilityWatcher:
+    """Background thread that feeds the hub, one per process.
+
+    While at least one stream is open it reads the lots' change stamp every
+    AVAILABILITY_POLL_SECONDS, or at once after notify(), and the lots
+    themselves only when the stamp has moved. That is one small query per
+    process per tick however many browsers are connected, and it picks up
+    changes committed by the other worker processes too. With no streams
+    open it sleeps and queries nothing. Started by the first stream of each
+    process, so forked workers get their own thread.
+    """
+
+    def __init__(self, hub):
+        self._hub = hub
+        self._lock = threading.Lock()
+        self._pid = None
+        self._app = None
+
+    def init_app(self, app):
+        self._app = app
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, args=(self._app,),
+                             name='availability-watcher', daemon=True).start()
+
+    def _run(self, app):
+        stamp = None
+        while True:
+            if self._hub.wait_for_subscribers():
+                stamp = None
+            with app.app_context():
+                try:
+                    current = lot_list_stamp()
+                    if current != stamp or self._hub.snapshot() is None:
+                        self._hub.publish(read_lots())
+                        stamp = current
+                except Exception:
+                    app.logger.exception('Reading lot availability failed')
+                finally:
+                    db.session.remove()
+            self._hub.wait_for_change(app.config['AVAILABILITY_POLL_SECONDS'])
+
+
+def read_lots():
+    """{lot_id: lot_event_data} for every lot, from the lot counters."""
+    rows = db.session.execute(
+        select(ParkingLot.id, ParkingLot.occupied_spots, ParkingLot.total_spots).order_by(ParkingLot.id)
+    )
+    return {lot_id: lot_event_data(lot_id, occupied, total) for lot_id, occupied, total in rows}
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+def lot_event_data(lot_id, occupied_spots, total_spots):
+    return {
+        'lot_id': lot_id,
+        'occupied_spots': occupied_spots,
+        'total_spots': total_spots,
+        'available_spots': total_spots - occupied_spots
+    }
+
+
+availability_hub = EventHub()
+availability_watcher = AvailabilityWatcher(availability_hub)
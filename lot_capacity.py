@@ -0,0 +1,64 @@
+from sqlalchemy import select, insert, delete, func
+from models import db, ParkingSpot, Reservation
+
+
+class CapacityError(Exception):
+    """Raised when a lot's capacity cannot be changed; the message is user-facing."""
+
+
+def add_spots(lot, count):
+    """Bulk-insert count free spots into the lot inside the current transaction.
+
+    Returns the new spot ids. The caller commits.
+    """
+    if count <= 0:
+        return []
+    spot_ids = db.session.scalars(
+        insert(ParkingSpot).returning(ParkingSpot.id),
+        [{'lot_id': lot.id, 'status': 'A'} for _ in range(count)]
+    ).all()
+    lot.total_spots = lot.total_spots + count
+    return spot_ids
+
+
+def _removable_spots(lot):
+    """Criteria for spots that can go: free and never booked."""
+    return (
+        ParkingSpot.lot_id == lot.id,
+        ParkingSpot.status == 'A',
+        ~select(Reservation.id).where(Reservation.spot_id == ParkingSpot.id).exists()
+    )
+
+
+def remove_free_spots(lot, count):
+    """Bulk-delete count free, never-booked spots (highest ids first) inside the current transaction.
+
+    Spots with past reservations are kept so booking history and revenue stay
+    intact. Raises CapacityError if the lot has fewer spots it can remove.
+    The caller commits.
+    """
+    if count <= 0:
+        return
+    removable = _removable_spots(lot)
+    removable_spots = db.session.query(func.count(ParkingSpot.id)).filter(*removable).scalar()
+    if removable_spots < count:
+        raise CapacityError(
+            f'Only {removable_spots} spots can be removed from this lot; '
+            'spots that are occupied or have booking history are kept'
+        )
+
+    # Lowest id that goes: the count-th highest removable spot id.
+    cutoff_id = db.session.query(ParkingSpot.id).filter(*removable).order_by(
+        ParkingSpot.id.desc()
+    ).offset(count - 1).limit(1).scalar()
+
+    result = db.session.execute(
+        delete(ParkingSpot)
+        .where(*removable, ParkingSpot.id >= cutoff_id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != count:
+        # A booking took one of the spots in between; leave the lot untouched.
+        db.session.rollback()
+        raise CapacityError('Spots changed while resizing the lot, please try again')
+    lot.total_spots = lot.total_spots - count
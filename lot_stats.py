@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, case, and_
+from models import db, User, ParkingLot, DailyLotRevenue
+from utils import ist_date
+
+
+def available_spot_count():
+    """Free spots across all lots, read from the per-lot counters."""
+    return db.session.query(
+        func.coalesce(func.sum(ParkingLot.total_spots - ParkingLot.occupied_spots), 0)
+    ).scalar()
+
+
+def lot_summaries():
+    """Spot totals, occupied counts and revenue for every lot, in two queries.
+
+    Spot numbers come from the lot counters; revenue from the daily rollup.
+    Returns a list of plain dicts (JSON-serialisable) ordered by lot id.
+    """
+    spot_rows = db.session.query(
+        ParkingLot.id,
+        ParkingLot.prime_location_name,
+        ParkingLot.total_spots,
+        ParkingLot.occupied_spots
+    ).order_by(
+        ParkingLot.id
+    ).all()
+
+    revenue_by_lot = dict(db.session.query(
+        DailyLotRevenue.lot_id,
+        func.sum(DailyLotRevenue.revenue)
+    ).group_by(
+        DailyLotRevenue.lot_id
+    ).all())
+
+    return [{
+        'id': lot_id,
+        'name': name,
+        'total_spots': total_spots,
+        'occupied_spots': occupied_spots,
+        'available_spots': total_spots - occupied_spots,
+        'revenue': revenue_by_lot.get(lot_id) or 0
+    } for lot_id, name, total_spots, occupied_spots in spot_rows]
+
+
+def global_kpis(lot_data=None):
+    """Dashboard headline numbers: users, spots and revenue with day-over-day change."""
+    if lot_data is None:
+        lot_data = lot_summaries()
+
+    # Half-open datetime ranges instead of date(column) = day: the same SQL
+    # works on every backend and leaves the timestamp indexes usable.
+    today_start = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    yesterday_start = today_start - timedelta(days=1)
+
+    def on_day(column, start, end):
+        return and_(column >= start, column < end)
+
+    users, users_yesterday = db.session.query(
+        func.count(User.id),
+        func.coalesce(func.sum(case((on_day(User.created_at, yesterday_start, today_start), 1), else_=0)), 0)
+    ).one()
+    user_change = users - users_yesterday
+
+    # Revenue days are IST calendar days, as shown everywhere else in the app.
+    today = ist_date(datetime.utcnow())
+    yesterday = today - timedelta(days=1)
+    total_revenue, today_revenue, yesterday_revenue = db.session.query(
+        func.coalesce(func.sum(DailyLotRevenue.revenue), 0),
+        func.coalesce(func.sum(case((DailyLotRevenue.day == today, DailyLotRevenue.revenue), else_=0)), 0),
+        func.coalesce(func.sum(case((DailyLotRevenue.day == yesterday, DailyLotRevenue.revenue), else_=0)), 0)
+    ).one()
+    revenue_change = today_revenue - yesterday_revenue
+
+    total_spots = sum(lot['total_spots'] for lot in lot_data)
+    occupied_spots = sum(lot['occupied_spots'] for lot in lot_data)
+
+    return {
+        'users': users,
+        'user_change': user_change,
+        'user_change_percent': ((user_change / users_yesterday) * 100) if users_yesterday else 0,
+        'total_spots': total_spots,
+        'occupied_spots': occupied_spots,
+        'available_spots': total_spots - occupied_spots,
+        'total_revenue': total_revenue,
+        'today_revenue': today_revenue,
+        'yesterday_revenue': yesterday_revenue,
+        'revenue_change': revenue_change,
+        'revenue_change_percent': ((revenue_change / yesterday_revenue) * 100) if yesterday_revenue else 0
+    }
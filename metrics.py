@@ -0,0 +1,248 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from flask import g, request
+
+# Latency buckets in seconds, shared by every histogram unless overridden
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class MemoryStore:
+    """Totals private to this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)
+
+    def add(self, deltas):
+        with self._lock:
+            for key, amount in deltas.items():
+                self._values[key] += amount
+
+    def read(self):
+        with self._lock:
+            return dict(self._values)
+
+
+class SQLiteStore:
+    """Totals kept in a SQLite file, summed across every worker process."""
+
+    def __init__(self, path):
+        self._path = path
+        self._local = threading.local()
+        self._connect().execute('CREATE TABLE IF NOT EXISTS metric_samples ('
+                                'name TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL, '
+                                'PRIMARY KEY (name, labels))')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def add(self, deltas):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT INTO metric_samples (name, labels, value) VALUES (?, ?, ?) '
+                'ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value',
+                [(name, labels, amount) for (name, labels), amount in deltas.items()]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def read(self):
+        rows = self._connect().execute('SELECT name, labels, value FROM metric_samples').fetchall()
+        return {(name, labels): value for name, labels, value in rows}
+
+
+class Metric:
+    type = None
+
+    def __init__(self, registry, name, help, labelnames):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _labels(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}, got {tuple(labels)}')
+        return [(name, str(labels[name])) for name in self.labelnames]
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self.registry._add({(self.name, json.dumps(self._labels(labels))): amount})
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, registry, name, help, labelnames, buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        pairs = self._labels(labels)
+        deltas = {
+            # Every bucket gets a sample, even at zero, so the series is complete
+            (f'{self.name}_bucket', json.dumps(pairs + [('le', _format_number(bound))])): 1 if value <= bound else 0
+            for bound in self.buckets
+        }
+        deltas[(f'{self.name}_bucket', json.dumps(pairs + [('le', '+Inf')]))] = 1
+        deltas[(f'{self.name}_sum', json.dumps(pairs))] = value
+        deltas[(f'{self.name}_count', json.dumps(pairs))] = 1
+        self.registry._add(deltas)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+def _format_number(value):
+    return repr(float(value)) if value != int(value) else f'{int(value)}.0'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _sample_sort_key(labels):
+    # Histogram buckets sort by their numeric bound, +Inf last
+    plain = [pair for pair in labels if pair[0] != 'le']
+    bound = [float(value) for name, value in labels if name == 'le']
+    return plain, bound
+
+
+class MetricsRegistry:
+    """Counters and histograms rendered in the Prometheus text exposition format.
+
+    Updates are buffered per process and flushed into the store every
+    METRICS_FLUSH_SECONDS (and before every scrape). With METRICS_BACKEND =
+    'sqlite' all worker processes flush into one file, so /metrics on any
+    worker reports totals for the whole server.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.store = MemoryStore()
+        self.flush_interval = 0
+        self._pending = defaultdict(float)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._logger = None
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(self, name, help, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(self, name, help, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def init_app(self, app):
+        backend = app.config.get('METRICS_BACKEND', 'memory')
+        if backend == 'memory':
+            self.store = MemoryStore()
+            self.flush_interval = 0
+        elif backend == 'sqlite':
+            path = app.config.get('METRICS_SQLITE_PATH') or os.path.join(app.instance_path, 'metrics.db')
+            self.store = SQLiteStore(path)
+            self.flush_interval = app.config.get('METRICS_FLUSH_SECONDS', 5)
+            atexit.register(self.flush)
+        else:
+            raise ValueError(f'Unknown METRICS_BACKEND {backend!r}')
+        self._logger = app.logger
+
+        @app.before_request
+        def start_request_timer():
+            g.metrics_started = time.perf_counter()
+
+        @app.after_request
+        def record_request(response):
+            started = g.pop('metrics_started', None)
+            if started is not None:
+                endpoint = request.endpoint or '<unmatched>'
+                HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+                HTTP_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint)
+            return response
+
+    def _add(self, deltas):
+        with self._lock:
+            for key, amount in deltas.items():
+                self._pending[key] += amount
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            self.store.add(pending)
+        except sqlite3.Error:
+            # Keep the deltas for the next flush rather than losing them
+            with self._lock:
+                for key, amount in pending.items():
+                    self._pending[key] += amount
+            if self._logger is not None:
+                self._logger.warning('Metrics flush failed, will retry', exc_info=True)
+
+    def render(self):
+        self.flush()
+        samples = defaultdict(list)
+        for (name, labels), value in self.store.read().items():
+            samples[name].append((json.loads(labels), value))
+
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            names = [metric.name] if metric.type == 'counter' else [
+                f'{metric.name}_bucket', f'{metric.name}_sum', f'{metric.name}_count']
+            for name in names:
+                for labels, value in sorted(samples.get(name, ()), key=lambda s: _sample_sort_key(s[0])):
+                    label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels)
+                    value_text = str(int(value)) if float(value).is_integer() else repr(float(value))
+                    lines.append(f'{name}{{{label_text}}} {value_text}' if labels else f'{name} {value_text}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+HTTP_REQUESTS = metrics.counter(
+    'http_requests_total', 'HTTP requests by endpoint, method and status code.',
+    ('endpoint', 'method', 'status'))
+HTTP_LATENCY = metrics.histogram(
+    'http_request_duration_seconds', 'Time to build a response, by endpoint.', ('endpoint',))
+BOOKINGS = metrics.counter(
+    'parking_bookings_total', 'Successful bookings, by whether a lot or an exact spot was requested.', ('mode',))
+BOOKING_FAILURES = metrics.counter(
+    'parking_booking_failures_total', 'Refused bookings, by reason.', ('reason',))
+RELEASES = metrics.counter(
+    'parking_releases_total', 'Closed reservations: user vacate, admin end or admin force release.', ('kind',))
+OPERATION_LATENCY = metrics.histogram(
+    'parking_operation_duration_seconds', 'Time spent in the booking and release transactions.', ('operation',))
@@ -0,0 +1,33 @@
+"""password hash length
+
+Revision ID: e7b3c5d9f241
+Revises: d5a92e7c1b34
+Create Date: 2026-10-18 19:02:41.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3c5d9f241'
+down_revision = 'd5a92e7c1b34'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # scrypt hashes are about 160 characters
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=128),
+               type_=sa.String(length=255),
+               existing_nullable=True)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=255),
+               type_=sa.String(length=128),
+               existing_nullable=True)
@@ -1,31 +1,50 @@
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from datetime import datetime
+from replica import RoutingSession
+from passwords import password_hasher
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
     
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128))
+    # Long enough for scrypt hashes as well as pbkdf2
+    password_hash = db.Column(db.String(255))
     name = db.Column(db.String(100), nullable=False)
     address = db.Column(db.String(200), nullable=False, default='')
     pincode = db.Column(db.String(10), nullable=False, default='')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     role = db.Column(db.String(20), default='user')  # 'user' or 'admin'
+    # Bumped whenever the user's bookings change; versions the JSON API ETags
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Denormalised reservation totals for the admin user list, updated in the
+    # same transaction as every booking and release
+    total_bookings = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_spent = db.Column(db.Float, nullable=False, default=0, server_default='0')
     
     reservations = db.relationship('Reservation', backref='user', lazy=True)
     
+    __table_args__ = (
+        # Paging through the admin user list by name, bookings or spending
+        db.Index('ix_users_name', 'name', 'id'),
+        db.Index('ix_users_total_bookings', 'total_bookings', 'id'),
+        db.Index('ix_users_total_spent', 'total_spent', 'id'),
+    )
+    
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
-        print(f"Password hash generated for {self.role} {self.email}")
+        self.password_hash = password_hasher.hash(password)
+        current_app.logger.debug('Password hash set for user %s (%s)', self.id or self.email, self.role or 'user')
     
     def check_password(self, password):
-        result = check_password_hash(self.password_hash, password)
-        print(f"Password check for {self.role} {self.email}: {'success' if result else 'failed'}")
+        result = password_hasher.verify(self.password_hash, password)
+        if result:
+            current_app.logger.debug('Password check passed for user %s (%s)', self.id, self.role)
+        else:
+            current_app.logger.info('Password check failed for user %s (%s)', self.id, self.role)
         return result
     
     def is_admin(self):
@@ -44,6 +63,11 @@ class ParkingLot(db.Model):
     pincode = db.Column(db.Integer, nullable=False)
     max_spots = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Denormalised counters, updated in the same transaction as every spot change
+    total_spots = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    occupied_spots = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Bumped whenever the lot or any of its spots changes; versions the JSON API ETags
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     spots = db.relationship('ParkingSpot', backref='parking_lot', lazy=True, cascade='all, delete-orphan')
     
@@ -59,6 +83,10 @@ class ParkingSpot(db.Model):
     
     reservations = db.relationship('Reservation', backref='parking_spot', lazy=True)
     
+    __table_args__ = (
+        db.Index('ix_parking_spots_lot_status', 'lot_id', 'status'),
+    )
+    
     def __repr__(self):
         return f'<ParkingSpot {self.id} in Lot {self.lot_id}>'
 
@@ -78,5 +106,93 @@ class Reservation(db.Model):
     payment_time = db.Column(db.DateTime, nullable=True)
     force_released = db.Column(db.Boolean, nullable=True, default=False)
     
+    __table_args__ = (
+        # A user can hold at most one open (not yet vacated) reservation.
+        db.Index('ix_reservations_open_user', 'user_id', unique=True,
+                 sqlite_where=db.text('leaving_timestamp IS NULL'),
+                 postgresql_where=db.text('leaving_timestamp IS NULL')),
+        # A spot can carry at most one open reservation.
+        db.Index('ix_reservations_open_spot', 'spot_id', unique=True,
+                 sqlite_where=db.text('leaving_timestamp IS NULL'),
+                 postgresql_where=db.text('leaving_timestamp IS NULL')),
+        db.Index('ix_reservations_user_parked', 'user_id', 'parking_timestamp'),
+        db.Index('ix_reservations_user_left', 'user_id', 'leaving_timestamp'),
+        db.Index('ix_reservations_spot_left', 'spot_id', 'leaving_timestamp'),
+        db.Index('ix_reservations_parked', 'parking_timestamp', 'id'),
+        db.Index('ix_reservations_left', 'leaving_timestamp'),
+    )
+    
     def __repr__(self):
         return f'<Reservation {self.id}>'
+
+class SpotChange(db.Model):
+    """One row per booking or release, keyed by the lot version it produced.
+
+    Backs the spot-map delta endpoint; old rows are pruned by
+    `flask prune-spot-changes`.
+    """
+    __tablename__ = 'spot_changes'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    lot_id = db.Column(db.Integer, db.ForeignKey('parking_lots.id'), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    spot_id = db.Column(db.Integer, nullable=False)  # no FK: the log outlives spots removed by a resize
+    status = db.Column(db.String(1), nullable=False)  # status the spot changed to
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_spot_changes_lot_version', 'lot_id', 'version', unique=True),
+        db.Index('ix_spot_changes_changed_at', 'changed_at'),
+    )
+    
+    def __repr__(self):
+        return f'<SpotChange lot {self.lot_id} v{self.version}: spot {self.spot_id} -> {self.status}>'
+
+class DailyLotRevenue(db.Model):
+    """Revenue of one lot on one IST calendar day.
+
+    Kept up to date when reservations are closed (see revenue.py), so the
+    revenue KPIs read a few rows per lot instead of every reservation.
+    `flask backfill-revenue` rebuilds it from the reservations table.
+    """
+    __tablename__ = 'daily_lot_revenue'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    lot_id = db.Column(db.Integer, db.ForeignKey('parking_lots.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)  # IST date the reservations were closed on
+    revenue = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    reservations = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    __table_args__ = (
+        db.Index('ix_daily_lot_revenue_lot_day', 'lot_id', 'day', unique=True),
+        db.Index('ix_daily_lot_revenue_day', 'day'),
+    )
+    
+    def __repr__(self):
+        return f'<DailyLotRevenue lot {self.lot_id} {self.day}: {self.revenue}>'
+
+class OccupancySnapshot(db.Model):
+    """Occupancy of one lot over one sampling period.
+
+    Raw samples cover one sampler interval; older ones are folded into hourly
+    rows (resolution 3600) by occupancy.compact_snapshots. occupied is the
+    average over the period, peak the highest sample.
+    """
+    __tablename__ = 'occupancy_snapshots'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    lot_id = db.Column(db.Integer, db.ForeignKey('parking_lots.id'), nullable=False)
+    taken_at = db.Column(db.DateTime, nullable=False)  # UTC start of the period
+    resolution = db.Column(db.Integer, nullable=False)  # period length in seconds
+    occupied = db.Column(db.Float, nullable=False)
+    peak = db.Column(db.Integer, nullable=False)
+    total = db.Column(db.Integer, nullable=False)
+    samples = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    
+    __table_args__ = (
+        db.Index('ix_occupancy_snapshots_lot_period', 'lot_id', 'resolution', 'taken_at', unique=True),
+        db.Index('ix_occupancy_snapshots_taken_at', 'taken_at'),
+    )
+    
+    def __repr__(self):
+        return f'<OccupancySnapshot lot {self.lot_id} {self.taken_at}: {self.occupied}/{self.total}>'
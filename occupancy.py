@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, delete, func
+from models import db, ParkingLot, OccupancySnapshot
+from database import on_conflict_insert
+from utils import utc_to_ist, IST_OFFSET
+
+HOURLY = 3600
+
+
+def floor_time(dt, seconds):
+    """dt rounded down to a multiple of seconds since midnight."""
+    midnight = datetime.combine(dt.date(), datetime.min.time())
+    offset = (dt - midnight).total_seconds()
+    return midnight + timedelta(seconds=offset - offset % seconds)
+
+
+def floor_ist_hour(dt):
+    """Start, in UTC, of the IST clock hour holding the UTC datetime dt.
+
+    IST is UTC+05:30, so its hours start at half past each UTC hour; hourly
+    rows cut on UTC hours would each straddle two hours of the heatmap.
+    """
+    return floor_time(dt + IST_OFFSET, HOURLY) - IST_OFFSET
+
+
+def _insert_new(rows):
+    # Several workers may sample or compact the same period; the unique
+    # (lot, resolution, taken_at) index keeps the first row.
+    if not rows:
+        return
+    dialect_insert = on_conflict_insert(db.engine)
+    if dialect_insert is None:
+        db.session.execute(insert(OccupancySnapshot), rows)
+    else:
+        db.session.execute(dialect_insert(OccupancySnapshot).on_conflict_do_nothing(), rows)
+
+
+def take_sample(interval, now=None):
+    """Record every lot's current occupancy from the lot counters. The caller commits.
+
+    The timestamp is floored to the interval, so samples from different
+    processes for the same tick collapse into one row.
+    """
+    taken_at = floor_time(now or datetime.utcnow(), interval)
+    lots = db.session.execute(
+        select(ParkingLot.id, ParkingLot.occupied_spots, ParkingLot.total_spots)
+    ).all()
+    _insert_new([{
+        'lot_id': lot_id, 'taken_at': taken_at, 'resolution': interval,
+        'occupied': occupied, 'peak': occupied, 'total': total, 'samples': 1
+    } for lot_id, occupied, total in lots])
+    return len(lots)
+
+
+def compact_snapshots(raw_retention, retention, now=None):
+    """Fold raw samples older than raw_retention into hourly rows, and drop
+    hourly rows older than retention (both timedeltas). The caller commits.
+
+    Hourly rows cover IST clock hours, as the heatmap shows them.
+
+    Returns (raw rows folded, hourly rows dropped).
+    """
+    now = now or datetime.utcnow()
+    # Only whole IST hours are folded, so an hourly row is never written twice.
+    cutoff = floor_ist_hour(now - raw_retention)
+    raw = OccupancySnapshot.resolution < HOURLY, OccupancySnapshot.taken_at < cutoff
+
+    hours = defaultdict(lambda: [0.0, 0, 0, 0])  # occupied x samples, samples, peak, total
+    for lot_id, taken_at, occupied, peak, total, samples in db.session.execute(
+        select(OccupancySnapshot.lot_id, OccupancySnapshot.taken_at, OccupancySnapshot.occupied,
+               OccupancySnapshot.peak, OccupancySnapshot.total, OccupancySnapshot.samples)
+        .where(*raw)
+        .execution_options(yield_per=5000)
+    ):
+        hour = hours[(lot_id, floor_ist_hour(taken_at))]
+        hour[0] += occupied * samples
+        hour[1] += samples
+        hour[2] = max(hour[2], peak)
+        hour[3] = max(hour[3], total)
+    _insert_new([{
+        'lot_id': lot_id, 'taken_at': taken_at, 'resolution': HOURLY,
+        'occupied': weighted / samples, 'peak': peak, 'total': total, 'samples': samples
+    } for (lot_id, taken_at), (weighted, samples, peak, total) in hours.items()])
+
+    folded = db.session.execute(delete(OccupancySnapshot).where(*raw)).rowcount
+    dropped = db.session.execute(
+        delete(OccupancySnapshot).where(OccupancySnapshot.taken_at < now - retention)
+    ).rowcount
+    return folded, dropped
+
+
+def hourly_utilization(days, lot_id=None):
+    """Average utilization (0-1) per IST weekday and hour over the last days.
+
+    Returns a 7x24 list (Monday first) with None where nothing was sampled.
+    Reads only occupancy_snapshots, summed per timestamp across lots.
+    """
+    query = select(
+        OccupancySnapshot.taken_at,
+        func.sum(OccupancySnapshot.occupied * OccupancySnapshot.samples),
+        func.sum(OccupancySnapshot.total * OccupancySnapshot.samples)
+    ).where(
+        OccupancySnapshot.taken_at >= datetime.utcnow() - timedelta(days=days)
+    ).group_by(OccupancySnapshot.taken_at)
+    if lot_id is not None:
+        query = query.where(OccupancySnapshot.lot_id == lot_id)
+
+    occupied = [[0.0] * 24 for _ in range(7)]
+    capacity = [[0.0] * 24 for _ in range(7)]
+    for taken_at, occupied_sum, total_sum in db.session.execute(query):
+        ist = utc_to_ist(taken_at)
+        occupied[ist.weekday()][ist.hour] += occupied_sum or 0
+        capacity[ist.weekday()][ist.hour] += total_sum or 0
+    return [
+        [occupied[day][hour] / capacity[day][hour] if capacity[day][hour] else None for hour in range(24)]
+        for day in range(7)
+    ]
+
+
+class OccupancySampler:
+    """Background thread that samples occupancy every OCCUPANCY_SAMPLE_SECONDS.
+
+    Started lazily on the first request of each process, so forked workers
+    get their own thread. Compaction runs at most once an hour. Set
+    OCCUPANCY_SAMPLE_SECONDS to 0 to disable it and drive
+    `flask sample-occupancy` / `flask compact-occupancy` from cron instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def init_app(self, app):
+        interval = app.config.get('OCCUPANCY_SAMPLE_SECONDS', 0)
+        if not interval:
+            return
+
+        @app.before_request
+        def start_occupancy_sampler():
+            self.ensure_started(app, interval)
+
+    def ensure_started(self, app, interval):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, args=(app, interval),
+                             name='occupancy-sampler', daemon=True).start()
+
+    def _run(self, app, interval):
+        last_compacted = 0
+        while True:
+            # Wake on interval boundaries so every process samples the same tick
+            time.sleep(interval - time.time() % interval)
+            with app.app_context():
+                try:
+                    take_sample(interval)
+                    if time.time() - last_compacted >= HOURLY:
+                        compact_snapshots(
+                            timedelta(hours=app.config['OCCUPANCY_RAW_RETENTION_HOURS']),
+                            timedelta(days=app.config['OCCUPANCY_RETENTION_DAYS'])
+                        )
+                        last_compacted = time.time()
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Occupancy sampling failed')
+                finally:
+                    db.session.remove()
+
+
+occupancy_sampler = OccupancySampler()
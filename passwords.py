@@ -0,0 +1,109 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+
+class HasherBusy(Exception):
+    """Every hashing slot is taken; the caller should ask the user to retry."""
+
+
+def expand_method(method):
+    """The method string werkzeug stores for method, e.g. 'scrypt' -> 'scrypt:32768:8:1'.
+
+    Follows werkzeug's defaults without hashing anything. Raises ValueError
+    for a malformed scrypt or pbkdf2 method.
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        if not args:
+            return 'scrypt:32768:8:1'
+        try:
+            n, r, p = map(int, args)
+        except ValueError:
+            raise ValueError(f'scrypt takes 3 arguments: {method!r}') from None
+        return f'scrypt:{n}:{r}:{p}'
+    if name == 'pbkdf2':
+        if len(args) > 2:
+            raise ValueError(f'pbkdf2 takes 2 arguments: {method!r}')
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        hashlib.new(hash_name)  # unknown digest names fail here, not at the first login
+        return f'pbkdf2:{hash_name}:{iterations}'
+    return method
+
+
+class PasswordHasher:
+    """Password hashing on a small per-process thread pool.
+
+    Hashing is deliberately slow CPU work. hashlib releases the GIL while it
+    runs, so PASSWORD_HASH_WORKERS hashes can run on that many cores at once
+    while the remaining server threads keep answering other requests. At most
+    PASSWORD_HASH_QUEUE hashes are running or waiting for the pool; beyond
+    that callers get HasherBusy at once instead of waiting, so a burst of
+    logins holds at most that many server threads. Keep it below the
+    server's thread count.
+
+    PASSWORD_HASH_METHOD is any werkzeug method, e.g. 'pbkdf2:sha256:600000'
+    or 'scrypt:32768:8:1'. Stored hashes made with other parameters still
+    verify, and needs_rehash() tells the login to upgrade them.
+    """
+
+    def __init__(self):
+        self.method = 'pbkdf2:sha256:600000'
+        self.salt_length = 16
+        self.workers = 0
+        self._prefix = None
+        self._slots = None
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.salt_length = app.config.get('PASSWORD_SALT_LENGTH', self.salt_length)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 0)
+        self._slots = threading.BoundedSemaphore(max(self.workers, app.config.get('PASSWORD_HASH_QUEUE', self.workers)))
+        # Stored hashes carry the expanded form of the method
+        self._prefix = expand_method(self.method)
+        self._executor = None
+
+    def _pool(self):
+        # Pool threads do not survive a fork; each worker process starts its own
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = self._pool().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        if not password_hash:
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        if self._prefix is None:
+            self._prefix = expand_method(self.method)
+        method, _, rest = password_hash.partition('$')
+        salt = rest.split('$', 1)[0]
+        return method != self._prefix or len(salt) != self.salt_length
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,206 @@
+import heapq
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from flask import g, has_request_context, request, before_render_template, template_rendered
+from sqlalchemy import event
+
+# Longest SQL text kept for the slowest-statement lists
+STATEMENT_PREVIEW = 300
+
+_local = threading.local()
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list, e.g. fraction=0.95."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class RequestProfile:
+    """What one request spent in the database and in templates (times in ms)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.statements = []  # (duration, sql)
+        self._template_starts = []
+
+    def add_query(self, duration, statement):
+        self.queries += 1
+        self.db_time += duration
+        self.statements.append((duration, statement))
+
+    def elapsed(self):
+        return (time.perf_counter() - self.started) * 1000
+
+
+class ProfileStore:
+    """Rolling per-endpoint request timings plus each endpoint's slowest statements.
+
+    Kept in process memory, so every worker process has its own numbers.
+    """
+
+    def __init__(self, window=500, slow_statements=5):
+        self.window = window
+        self.slow_statements = slow_statements
+        self._lock = threading.Lock()
+        self._requests = defaultdict(lambda: deque(maxlen=self.window))
+        self._slowest = defaultdict(list)  # endpoint -> min-heap of (duration, sql)
+
+    def record(self, endpoint, total, profile):
+        slowest = heapq.nlargest(self.slow_statements, profile.statements)
+        with self._lock:
+            self._requests[endpoint].append((total, profile.db_time, profile.queries, profile.template_time))
+            heap = self._slowest[endpoint]
+            for duration, statement in slowest:
+                entry = (duration, statement[:STATEMENT_PREVIEW])
+                if len(heap) < self.slow_statements:
+                    heapq.heappush(heap, entry)
+                elif duration > heap[0][0]:
+                    heapq.heapreplace(heap, entry)
+
+    def summary(self):
+        """One dict per endpoint, slowest p95 first."""
+        with self._lock:
+            snapshot = {endpoint: list(samples) for endpoint, samples in self._requests.items()}
+            slowest = {endpoint: sorted(heap, reverse=True) for endpoint, heap in self._slowest.items()}
+        rows = []
+        for endpoint, samples in snapshot.items():
+            totals = [s[0] for s in samples]
+            db_times = [s[1] for s in samples]
+            queries = [s[2] for s in samples]
+            template_times = [s[3] for s in samples]
+            rows.append({
+                'endpoint': endpoint,
+                'requests': len(samples),
+                'p50': percentile(totals, 0.5),
+                'p95': percentile(totals, 0.95),
+                'p99': percentile(totals, 0.99),
+                'db_p50': percentile(db_times, 0.5),
+                'db_p95': percentile(db_times, 0.95),
+                'template_p95': percentile(template_times, 0.95),
+                'queries_avg': sum(queries) / len(queries),
+                'queries_max': max(queries),
+                'slowest': slowest.get(endpoint, [])
+            })
+        rows.sort(key=lambda row: row['p95'], reverse=True)
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._slowest.clear()
+
+
+def _current_profile():
+    return g.get('profile') if has_request_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = (time.perf_counter() - conn.info['query_start'].pop()) * 1000
+    profile = _current_profile()
+    if profile is not None:
+        profile.add_query(duration, statement)
+    for counter in getattr(_local, 'counters', ()):
+        counter.append(statement)
+
+
+def _template_started(sender, template, context, **extra):
+    profile = _current_profile()
+    if profile is not None:
+        profile._template_starts.append(time.perf_counter())
+
+
+def _template_finished(sender, template, context, **extra):
+    profile = _current_profile()
+    if profile is not None and profile._template_starts:
+        started = profile._template_starts.pop()
+        # Only the outermost render counts, nested ones are already inside it
+        if not profile._template_starts:
+            profile.template_time += (time.perf_counter() - started) * 1000
+
+
+class Profiler:
+    """Per-request query counts, DB time and template time.
+
+    With PROFILING on, every response gets a Server-Timing header and each
+    endpoint's timings are kept for /admin/perf. Query counting for
+    assert_max_queries works either way.
+    """
+
+    def __init__(self):
+        self.store = ProfileStore()
+        self.enabled = False
+
+    def init_app(self, app):
+        with app.app_context():
+            for engine in app.extensions['sqlalchemy'].engines.values():
+                event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+        self.enabled = app.config.get('PROFILING', False)
+        if not self.enabled:
+            return
+        self.store = ProfileStore(app.config.get('PROFILING_WINDOW', 500),
+                                  app.config.get('PROFILING_SLOW_STATEMENTS', 5))
+        before_render_template.connect(_template_started, app)
+        template_rendered.connect(_template_finished, app)
+
+        @app.before_request
+        def start_profile():
+            g.profile = RequestProfile()
+
+        @app.after_request
+        def finish_profile(response):
+            profile = g.pop('profile', None)
+            if profile is None:
+                return response
+            total = profile.elapsed()
+            # Streamed bodies (exports, the event feed) are timed up to the first byte.
+            response.headers['Server-Timing'] = (
+                f'db;dur={profile.db_time:.1f};desc="{profile.queries} queries", '
+                f'tpl;dur={profile.template_time:.1f}, '
+                f'total;dur={total:.1f}'
+            )
+            self.store.record(request.endpoint or '<unmatched>', total, profile)
+            return response
+
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements this thread runs inside the block into a list."""
+    statements = []
+    counters = getattr(_local, 'counters', None)
+    if counters is None:
+        counters = _local.counters = []
+    counters.append(statements)
+    try:
+        yield statements
+    finally:
+        counters.remove(statements)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """Fail if the block runs more than limit SQL statements.
+
+    For tests and benchmarks, e.g.:
+        with assert_max_queries(6):
+            client.get('/admin/dashboard')
+    """
+    with count_queries() as statements:
+        yield statements
+    if len(statements) > limit:
+        listing = '\n'.join(f'  {n}. {sql}' for n, sql in enumerate(statements, 1))
+        raise AssertionError(f'{len(statements)} queries executed, expected at most {limit}:\n{listing}')
+
+
+profiler = Profiler()
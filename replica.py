@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+from flask import g, current_app, has_app_context
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+
+
+def configure_replica(app):
+    """Register the 'replica' bind from config. Call before db.init_app(app).
+
+    REPLICA_DATABASE_URL points at a second database kept in sync elsewhere
+    (e.g. a PostgreSQL hot standby). Otherwise, with REPLICA_SNAPSHOT on and a
+    SQLite primary, analytics read from instance/replica.db, a copy made with
+    SQLite's online backup API. When it is older than a route allows, a
+    background thread takes a new copy while requests keep reading the old one.
+    """
+    app.config['REPLICA_SNAPSHOT_PATH'] = None
+    url = app.config.get('REPLICA_DATABASE_URL')
+    primary_url = app.config['SQLALCHEMY_DATABASE_URI']
+    if url:
+        app.config.setdefault('SQLALCHEMY_BINDS', {})[REPLICA_BIND] = url
+    elif app.config.get('REPLICA_SNAPSHOT') and primary_url.startswith('sqlite:///'):
+        path = os.path.join(app.instance_path, 'replica.db')
+        app.config.setdefault('SQLALCHEMY_BINDS', {})[REPLICA_BIND] = f'sqlite:///file:{path}?mode=ro&uri=true'
+        app.config['REPLICA_SNAPSHOT_PATH'] = path
+
+
+class RoutingSession(Session):
+    """Sends reads to the replica bind inside views marked with read_from_replica.
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None
+                and has_app_context()
+                and g.get('read_replica')
+                and not self._flushing
+                and not getattr(clause, 'is_dml', False)):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+_refresh_lock = threading.Lock()
+_refresh_thread = None
+_refresh_failed = False
+
+
+def snapshot_age(path):
+    try:
+        return time.time() - os.path.getmtime(path)
+    except OSError:
+        return float('inf')
+
+
+def refresh_snapshot(source_path, path):
+    """Copy the primary SQLite file to path.
+
+    The copy is one backup step: a single read transaction, which in WAL
+    mode does not block writers, and which a write cannot restart the way it
+    restarts a stepwise backup. It is built next to the target and swapped in
+    with os.replace, so readers see either the old snapshot or the new one,
+    never a partial file.
+    """
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(tmp_path)
+    try:
+        source.backup(target, pages=-1)
+        # A WAL-mode copy would pair with a stale -wal file after the swap.
+        target.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        target.close()
+        source.close()
+    os.replace(tmp_path, path)
+
+
+def _refresh_in_background(source_path, path, replica_engine, logger):
+    global _refresh_failed
+    try:
+        refresh_snapshot(source_path, path)
+    except (OSError, sqlite3.Error):
+        logger.exception('Replica snapshot failed, stale reports read from the primary')
+        _refresh_failed = True
+        return
+    _refresh_failed = False
+    # Pooled connections still hold the replaced file open.
+    replica_engine.dispose()
+
+
+def ensure_fresh_snapshot(db, max_staleness):
+    """Start a background refresh if the snapshot is older than max_staleness.
+
+    Returns whether the replica can be read meanwhile: not before the first
+    snapshot exists, nor while a stale one cannot be refreshed.
+    """
+    global _refresh_thread
+    path = current_app.config['REPLICA_SNAPSHOT_PATH']
+    age = snapshot_age(path)
+    if age > max_staleness:
+        with _refresh_lock:
+            if _refresh_thread is None or not _refresh_thread.is_alive():
+                _refresh_thread = threading.Thread(
+                    target=_refresh_in_background,
+                    args=(db.engines[None].url.database, path, db.engines[REPLICA_BIND], current_app.logger),
+                    name='replica-snapshot',
+                    daemon=True
+                )
+                _refresh_thread.start()
+        return age != float('inf') and not _refresh_failed
+    return True
+
+
+def read_from_replica(max_staleness):
+    """Serve the view's reads from the replica, refreshing a snapshot older than max_staleness seconds.
+
+    A stale snapshot keeps serving while its replacement is taken in the
+    background. Falls back to the primary when no replica is configured or
+    no snapshot has been taken yet.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            db = current_app.extensions['sqlalchemy']
+            if REPLICA_BIND in db.engines:
+                if not current_app.config['REPLICA_SNAPSHOT_PATH'] or ensure_fresh_snapshot(db, max_staleness):
+                    g.read_replica = True
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,95 @@
+from collections import defaultdict
+from sqlalchemy import select, insert, update, delete, func
+from models import db, User, ParkingSpot, Reservation, DailyLotRevenue
+from database import on_conflict_insert
+from utils import ist_date
+
+
+def add_revenue(lot_id, day, amount, count=1):
+    """Add amount and count closed reservations to a lot's day inside the current transaction.
+
+    Negative values take revenue back out. The row is upserted with SQL
+    increments, so concurrent releases in the same lot and day cannot lose
+    each other's updates. The caller commits.
+    """
+    dialect_insert = on_conflict_insert(db.engine)
+    if dialect_insert is None:
+        result = db.session.execute(
+            update(DailyLotRevenue)
+            .where(DailyLotRevenue.lot_id == lot_id, DailyLotRevenue.day == day)
+            .values(revenue=DailyLotRevenue.revenue + amount,
+                    reservations=DailyLotRevenue.reservations + count)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            db.session.execute(
+                insert(DailyLotRevenue)
+                .values(lot_id=lot_id, day=day, revenue=amount, reservations=count)
+            )
+        return
+
+    stmt = dialect_insert(DailyLotRevenue).values(lot_id=lot_id, day=day, revenue=amount, reservations=count)
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[DailyLotRevenue.lot_id, DailyLotRevenue.day],
+            set_={
+                'revenue': DailyLotRevenue.revenue + stmt.excluded.revenue,
+                'reservations': DailyLotRevenue.reservations + stmt.excluded.reservations
+            }
+        )
+    )
+
+
+def record_release(lot_id, leaving_timestamp, parking_cost):
+    """Book a just-closed reservation into the rollup. The caller commits."""
+    add_revenue(lot_id, ist_date(leaving_timestamp), parking_cost or 0)
+
+
+def _closed_reservation_totals(query):
+    # (lot_id, leaving_timestamp, parking_cost) rows -> {(lot_id, ist day): [revenue, count]}
+    totals = defaultdict(lambda: [0, 0])
+    for lot_id, leaving_timestamp, parking_cost in db.session.execute(query.execution_options(yield_per=5000)):
+        entry = totals[(lot_id, ist_date(leaving_timestamp))]
+        entry[0] += parking_cost or 0
+        entry[1] += 1
+    return totals
+
+
+def rebuild_revenue():
+    """Recompute the whole rollup from closed reservations. The caller commits.
+
+    Reservations are grouped by IST date in Python, which keeps the SQL the
+    same on every backend. Returns the number of rollup rows written.
+    """
+    totals = _closed_reservation_totals(
+        select(ParkingSpot.lot_id, Reservation.leaving_timestamp, Reservation.parking_cost)
+        .join(ParkingSpot, ParkingSpot.id == Reservation.spot_id)
+        .where(Reservation.leaving_timestamp.isnot(None))
+    )
+    db.session.execute(delete(DailyLotRevenue))
+    rows = [
+        {'lot_id': lot_id, 'day': day, 'revenue': round(amount, 2), 'reservations': count}
+        for (lot_id, day), (amount, count) in totals.items()
+    ]
+    if rows:
+        db.session.execute(insert(DailyLotRevenue), rows)
+    return len(rows)
+
+
+def rebuild_user_totals(user_ids=None):
+    """Recompute users' booking count and spending from their reservations.
+
+    For all users, or only user_ids (e.g. the customers of a deleted lot).
+    The caller commits.
+    """
+    stmt = update(User).values(
+        total_bookings=select(func.count(Reservation.id))
+        .where(Reservation.user_id == User.id).scalar_subquery(),
+        total_spent=select(func.coalesce(func.sum(Reservation.parking_cost), 0))
+        .where(Reservation.user_id == User.id).scalar_subquery()
+    ).execution_options(synchronize_session=False)
+    if user_ids is not None:
+        if not user_ids:
+            return
+        stmt = stmt.where(User.id.in_(user_ids))
+    db.session.execute(stmt)
@@ -0,0 +1,12 @@
+from flask import jsonify, session
+from flask_login import login_required
+from ..admin import admin_bp
+from cache import cache
+
+@admin_bp.route('/cache_stats')
+@login_required
+def cache_stats():
+    if session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied'})
+
+    return jsonify({'success': True, 'data': cache.stats()})
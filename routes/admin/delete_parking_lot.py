@@ -1,7 +1,12 @@
 from flask import jsonify, request, session, redirect, url_for, flash
 from flask_login import login_required, current_user
 from ..admin import admin_bp
-from models import db, ParkingLot, ParkingSpot, Reservation
+from models import db, ParkingLot, ParkingSpot, Reservation, SpotChange, DailyLotRevenue, OccupancySnapshot
+from spot_allocator import spot_allocator
+from events import availability_hub
+from cache import cache
+from versions import bump_lot_user_versions
+from revenue import rebuild_user_totals
 
 @admin_bp.route('/parking_lot/<int:lot_id>/delete', methods=['POST'])
 @login_required
@@ -20,13 +25,23 @@ def delete_parking_lot(lot_id):
         flash('Cannot delete parking lot with occupied spots', 'danger')
         return redirect(url_for('admin.admin_parking_lots'))
         
+    bump_lot_user_versions(lot_id)
     spot_ids = [spot.id for spot in ParkingSpot.query.filter_by(lot_id=lot_id).all()]
     if spot_ids:
+        lot_user_ids = [user_id for (user_id,) in db.session.query(Reservation.user_id).filter(
+            Reservation.spot_id.in_(spot_ids)).distinct()]
         Reservation.query.filter(Reservation.spot_id.in_(spot_ids)).delete(synchronize_session=False)
+        rebuild_user_totals(lot_user_ids)
     ParkingSpot.query.filter_by(lot_id=lot_id).delete()
+    SpotChange.query.filter_by(lot_id=lot_id).delete()
+    DailyLotRevenue.query.filter_by(lot_id=lot_id).delete()
+    OccupancySnapshot.query.filter_by(lot_id=lot_id).delete()
         
     db.session.delete(lot)
     db.session.commit()
+    spot_allocator.remove_lot(lot_id)
+    cache.invalidate_lot(lot_id, details=True)
+    availability_hub.notify()
         
     flash('Parking lot deleted successfully', 'success')
     return redirect(url_for('admin.admin_parking_lots'))
@@ -2,6 +2,7 @@ from flask import jsonify, request, session
 from flask_login import login_required, current_user
 from ..admin import admin_bp
 from models import db, User
+from cache import cache, user_tag
 
 @admin_bp.route('/delete_user/<int:user_id>', methods=['POST'])
 @login_required
@@ -12,6 +13,7 @@ def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    cache.invalidate(user_tag(user_id))
         
     return jsonify({'success': True, 'message': 'User deleted successfully'})
         
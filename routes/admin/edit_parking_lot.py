@@ -1,8 +1,13 @@
 from flask import render_template, request, redirect, url_for, flash, session
 from flask_login import login_required, current_user
 from ..admin import admin_bp
-from models import db, ParkingLot, ParkingSpot
+from models import db, ParkingLot
 from forms import ParkingLotForm
+from spot_allocator import spot_allocator
+from events import availability_hub
+from cache import cache
+from versions import bump_lot_version, bump_lot_user_versions
+from lot_capacity import add_spots, remove_free_spots, CapacityError
 
 @admin_bp.route('/parking_lot/<int:lot_id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -15,24 +20,38 @@ def edit_parking_lot(lot_id):
     form = ParkingLotForm(obj=lot)
     
     if form.validate_on_submit():
-        old_max_spots = lot.max_spots
         new_max_spots = form.max_spots.data
+        renamed = lot.prime_location_name != form.prime_location_name.data
             
         lot.prime_location_name = form.prime_location_name.data
         lot.address = form.address.data
         lot.pincode = form.pincode.data
         lot.price = form.price.data
             
-        if new_max_spots > old_max_spots:
-            for i in range(old_max_spots, new_max_spots):
-                spot = ParkingSpot(
-                    lot_id=lot.id,
-                    status='A'
-                )
-                db.session.add(spot)
+        spot_delta = new_max_spots - lot.total_spots
+        new_spot_ids = []
+        try:
+            if spot_delta > 0:
+                new_spot_ids = add_spots(lot, spot_delta)
+            elif spot_delta < 0:
+                remove_free_spots(lot, -spot_delta)
+        except CapacityError as e:
+            db.session.rollback()
+            flash(str(e), 'danger')
+            return redirect(url_for('admin.admin_parking_lots'))
             
         lot.max_spots = new_max_spots
+        bump_lot_version(lot.id)
+        if renamed:
+            # Booking histories show the lot's name.
+            bump_lot_user_versions(lot.id)
         db.session.commit()
+        if spot_delta < 0:
+            spot_allocator.rebuild(lot.id)
+        else:
+            spot_allocator.add_spots(lot.id, new_spot_ids)
+        cache.invalidate_lot(lot.id, details=True)
+        availability_hub.notify()
         flash('Parking lot updated successfully!', 'success')
         return redirect(url_for('admin.admin_parking_lots'))
             
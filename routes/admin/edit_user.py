@@ -3,6 +3,8 @@ from flask_login import login_required, current_user
 from ..admin import admin_bp
 from models import db, User
 from forms import EditUserForm
+from cache import cache, user_tag
+from versions import bump_user_version
 
 @admin_bp.route('/edit_user/<int:user_id>', methods=['POST'])
 @login_required
@@ -14,15 +16,16 @@ def edit_user(user_id):
     form = EditUserForm()
         
     if form.validate_on_submit():
-        user.name = form.name.data
+        if User.query.filter(User.email == form.email.data, User.id != user_id).first():
+            return jsonify({'success': False, 'message': 'Email already registered'})
+        user.name = form.full_name.data
         user.email = form.email.data
         user.address = form.address.data
         user.pincode = form.pincode.data
-            
-        if form.password.data:
-            user.set_password(form.password.data)
-            
+        # Tells a cached identity filled from the old row that it is stale
+        bump_user_version(user_id)
         db.session.commit()
+        cache.invalidate(user_tag(user_id))
         return jsonify({'success': True, 'message': 'User updated successfully'})
     else:
         return jsonify({'success': False, 'message': 'Invalid form data'})
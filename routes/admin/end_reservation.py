@@ -1,9 +1,10 @@
-from datetime import datetime
-from flask import jsonify, request, session, redirect, url_for, flash
-from flask_login import login_required, current_user
+from flask import session, redirect, url_for, flash
+from flask_login import login_required
 from ..admin import admin_bp
-from models import db, ParkingSpot, Reservation
+from models import ParkingSpot, Reservation
 from utils import format_ist_datetime
+from booking import release_reservation, BookingError
+from metrics import RELEASES
 
 @admin_bp.route('/end_reservation/<int:spot_id>', methods=['POST'])
 @login_required
@@ -12,7 +13,7 @@ def end_reservation(spot_id):
         flash('Access denied', 'danger')
         return redirect(url_for('main.index'))
     
-    spot = ParkingSpot.query.get_or_404(spot_id)
+    ParkingSpot.query.get_or_404(spot_id)
     reservation = Reservation.query.filter_by(
         spot_id=spot_id,
         leaving_timestamp=None
@@ -22,20 +23,12 @@ def end_reservation(spot_id):
         flash('No active reservation found for this spot', 'danger')
         return redirect(url_for('admin.occupied_spots'))
         
-    now = datetime.utcnow()
-    duration = now - reservation.parking_timestamp
-    hours = duration.total_seconds() / 3600
-        
-    cost_per_hour = spot.parking_lot.price  # Using price from parking_lot
-    parking_cost = round(hours * cost_per_hour, 2)
-        
-    reservation.leaving_timestamp = now
-    reservation.parking_cost = parking_cost
-    reservation.status = 'completed'
-        
-    spot.status = 'A'
-        
-    db.session.commit()
+    try:
+        now, hours, parking_cost = release_reservation(reservation)
+    except BookingError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('admin.occupied_spots'))
+    RELEASES.inc(kind='end')
         
     end_time = format_ist_datetime(now)
     flash(f'Reservation ended at {end_time}. Cost: ₹{parking_cost}', 'success')
@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+from flask import Response, request, session, redirect, url_for, flash, stream_with_context
+from flask_login import login_required
+from ..admin import admin_bp
+from replica import read_from_replica
+from .parking_history import history_filters, history_query
+from models import Reservation, ParkingSpot, ParkingLot, User
+from utils import format_ist_datetime
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = ['reservation_id', 'parking_lot', 'spot_id', 'user', 'email', 'vehicle_number',
+                  'check_in', 'check_out', 'cost']
+
+def export_rows(filters):
+    """Yield one dict per reservation, streamed from a server-side cursor."""
+    query = history_query(filters).with_entities(
+        Reservation.id,
+        ParkingLot.prime_location_name,
+        ParkingSpot.id,
+        User.name,
+        User.email,
+        Reservation.vehicle_number,
+        Reservation.parking_timestamp,
+        Reservation.leaving_timestamp,
+        Reservation.parking_cost
+    ).yield_per(EXPORT_BATCH_SIZE)
+
+    for row in query:
+        yield {
+            'reservation_id': row[0],
+            'parking_lot': row[1],
+            'spot_id': row[2],
+            'user': row[3] or 'Deleted User',
+            'email': row[4] or '',
+            'vehicle_number': row[5] or '',
+            'check_in': format_ist_datetime(row[6]),
+            'check_out': format_ist_datetime(row[7]),
+            'cost': row[8]
+        }
+
+def generate_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def generate_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+@admin_bp.route('/parking_history/export', methods=['GET'])
+@login_required
+@read_from_replica(max_staleness=300)
+def export_parking_history():
+    if session.get('user_type') != 'admin':
+        flash('Access denied', 'danger')
+        return redirect(url_for('main.index'))
+
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        flash('Unsupported export format', 'danger')
+        return redirect(url_for('admin.parking_history'))
+
+    rows = export_rows(history_filters(request.args))
+    if export_format == 'csv':
+        body, mimetype = generate_csv(rows), 'text/csv'
+    else:
+        body, mimetype = generate_ndjson(rows), 'application/x-ndjson'
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=parking_history.{export_format}'}
+    )
@@ -1,8 +1,26 @@
-from flask import render_template, redirect, url_for, flash, session
+from flask import render_template, request, redirect, url_for, flash, session, make_response
 from flask_login import login_required, current_user
 from ..admin import admin_bp
 from models import db, ParkingSpot, ParkingLot, Reservation, User
 from datetime import datetime
+from sqlalchemy import func, select
+from utils import make_etag
+
+SPOTS_PER_PAGE = 50
+MAX_SPOTS_PER_PAGE = 500
+
+def occupancy_stamp():
+    """Cheap version stamp for the open reservations, in a single round-trip.
+
+    New bookings move max(id), releases move max(leaving_timestamp), and the
+    lot counters catch deletions.
+    """
+    return db.session.execute(select(
+        select(func.max(Reservation.id)).scalar_subquery(),
+        select(func.max(Reservation.leaving_timestamp)).scalar_subquery(),
+        select(func.count(ParkingLot.id)).scalar_subquery(),
+        select(func.sum(ParkingLot.occupied_spots)).scalar_subquery()
+    )).one()
 
 @admin_bp.route('/occupied_spots')
 @login_required
@@ -11,21 +29,51 @@ def occupied_spots():
         flash('Access denied', 'danger')
         return redirect(url_for('main.index'))
     
-    occupied_spots_raw = db.session.query(
-        ParkingSpot, ParkingLot, Reservation
+    lot_id = request.args.get('lot_id', type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', SPOTS_PER_PAGE, type=int), 1), MAX_SPOTS_PER_PAGE)
+    
+    # Durations and running costs are shown to the minute, so the minute is
+    # part of the version.
+    now = datetime.utcnow()
+    etag = make_etag(*occupancy_stamp(), now.strftime('%Y%m%d%H%M'), lot_id, page, per_page)
+    if '_flashes' not in session and request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+        response.set_etag(etag, weak=True)
+        return response
+    
+    query = db.session.query(
+        ParkingSpot, ParkingLot, Reservation, User
     ).join(
         Reservation, ParkingSpot.id == Reservation.spot_id
     ).join(
         ParkingLot, ParkingSpot.lot_id == ParkingLot.id
+    ).outerjoin(
+        User, Reservation.user_id == User.id
     ).filter(
         Reservation.leaving_timestamp.is_(None)
-    ).all()
-        
-    occupied_spots = []
-    for spot, lot, reservation in occupied_spots_raw:
-        user = User.query.get(reservation.user_id)
-        occupied_spots.append((spot, lot, reservation, user))
-            
-    now = datetime.utcnow()
-    return render_template('admin/admin_occupied_spots.html', occupied_spots=occupied_spots, now=now)
+    )
+    lots = ParkingLot.query.order_by(ParkingLot.prime_location_name).all()
+    if lot_id:
+        query = query.filter(ParkingSpot.lot_id == lot_id)
+        total_occupied = sum(lot.occupied_spots for lot in lots if lot.id == lot_id)
+    else:
+        total_occupied = sum(lot.occupied_spots for lot in lots)
+    pages = max((total_occupied + per_page - 1) // per_page, 1)
+    
+    occupied_spots = query.order_by(
+        Reservation.parking_timestamp, Reservation.id
+    ).limit(per_page).offset((page - 1) * per_page).all()
             
+    response = make_response(render_template('admin/admin_occupied_spots.html',
+        occupied_spots=occupied_spots,
+        now=now,
+        lots=lots,
+        selected_lot=lot_id,
+        page=page,
+        pages=pages,
+        per_page=per_page,
+        total_occupied=total_occupied))
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
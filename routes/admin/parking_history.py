@@ -1,50 +1,125 @@
 from flask import render_template, request, session, redirect, url_for, flash
 from flask_login import login_required
 from ..admin import admin_bp
+from replica import read_from_replica
 from models import db, Reservation, ParkingSpot, ParkingLot, User
-from datetime import datetime
-from sqlalchemy import and_
+from datetime import datetime, MINYEAR, MAXYEAR
+from sqlalchemy import and_, or_
 
-@admin_bp.route('/parking_history', methods=['GET'])
-@login_required
-def parking_history():
-    if session.get('user_type') != 'admin':
-        flash('Access denied', 'danger')
-        return redirect(url_for('main.index'))
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
 
-    lot_id = request.args.get('lot_id', type=int)
-    date_from = request.args.get('date_from')
-    date_to = request.args.get('date_to')
-    month = request.args.get('month')
-    year = request.args.get('year', type=int)
+def _valid_date(value):
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+        return value
+    except (TypeError, ValueError):
+        return None
 
+def history_filters(args):
+    """Read the parking history filters from request args.
+
+    Values that cannot be used (bad dates, month outside 1-12, a year the
+    month range cannot be built for) come back as None.
+    """
+    month = args.get('month', type=int)
+    year = args.get('year', type=int)
+    return {
+        'lot_id': args.get('lot_id', type=int),
+        'date_from': _valid_date(args.get('date_from')),
+        'date_to': _valid_date(args.get('date_to')),
+        'month': month if month is not None and 1 <= month <= 12 else None,
+        'year': year if year is not None and MINYEAR <= year < MAXYEAR else None
+    }
+
+def ignored_filters(args, filters):
+    """Names of the filters that were given but could not be used."""
+    return [name for name in ('date_from', 'date_to', 'month', 'year')
+            if args.get(name) and filters[name] is None]
+
+def history_query(filters):
+    """Reservations joined with spot, lot and user, filtered and newest first.
+
+    All filters are plain ranges on parking_timestamp so they can use
+    ix_reservations_parked.
+    """
     query = db.session.query(Reservation, ParkingSpot, ParkingLot, User)
     query = query.join(ParkingSpot, Reservation.spot_id == ParkingSpot.id)
     query = query.join(ParkingLot, ParkingSpot.lot_id == ParkingLot.id)
     query = query.outerjoin(User, Reservation.user_id == User.id)
 
-    if lot_id:
-        query = query.filter(ParkingLot.id == lot_id)
-    if date_from:
-        date_from_dt = datetime.strptime(date_from, '%Y-%m-%d')
+    if filters['lot_id']:
+        query = query.filter(ParkingLot.id == filters['lot_id'])
+    if filters['date_from']:
+        date_from_dt = datetime.strptime(filters['date_from'], '%Y-%m-%d')
         query = query.filter(Reservation.parking_timestamp >= date_from_dt)
-    if date_to:
-        date_to_dt = datetime.strptime(date_to, '%Y-%m-%d')
+    if filters['date_to']:
+        date_to_dt = datetime.strptime(filters['date_to'], '%Y-%m-%d')
         query = query.filter(Reservation.parking_timestamp <= date_to_dt)
-    if month and year:
-        month = int(month)
-        year = int(year)
-        query = query.filter(db.extract('month', Reservation.parking_timestamp) == month)
-        query = query.filter(db.extract('year', Reservation.parking_timestamp) == year)
-    reservations = query.order_by(Reservation.parking_timestamp.desc()).all()
+    if filters['month'] and filters['year']:
+        month, year = filters['month'], filters['year']
+        month_start = datetime(year, month, 1)
+        month_end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+        query = query.filter(
+            Reservation.parking_timestamp >= month_start,
+            Reservation.parking_timestamp < month_end
+        )
+    return query.order_by(Reservation.parking_timestamp.desc(), Reservation.id.desc())
+
+def parse_cursor(cursor):
+    """Decode a '<parking_timestamp>|<reservation id>' keyset cursor, or None."""
+    try:
+        timestamp, reservation_id = cursor.split('|')
+        return datetime.fromisoformat(timestamp), int(reservation_id)
+    except (AttributeError, ValueError):
+        return None
+
+def make_cursor(reservation):
+    return f'{reservation.parking_timestamp.isoformat()}|{reservation.id}'
+
+@admin_bp.route('/parking_history', methods=['GET'])
+@login_required
+@read_from_replica(max_staleness=60)
+def parking_history():
+    if session.get('user_type') != 'admin':
+        flash('Access denied', 'danger')
+        return redirect(url_for('main.index'))
+
+    filters = history_filters(request.args)
+    ignored = ignored_filters(request.args, filters)
+    if ignored:
+        flash(f'Ignored invalid filter: {", ".join(ignored)}', 'warning')
+    per_page = min(max(request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    cursor = request.args.get('cursor')
+
+    query = history_query(filters)
+    position = parse_cursor(cursor)
+    if position:
+        timestamp, reservation_id = position
+        query = query.filter(or_(
+            Reservation.parking_timestamp < timestamp,
+            and_(Reservation.parking_timestamp == timestamp, Reservation.id < reservation_id)
+        ))
+
+    # One extra row tells us whether an older page exists.
+    reservations = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(reservations) > per_page:
+        reservations = reservations[:per_page]
+        next_cursor = make_cursor(reservations[-1][0])
+
     lots = ParkingLot.query.order_by(ParkingLot.prime_location_name).all()
 
     return render_template('admin/admin_parking_history.html',
         reservations=reservations,
         lots=lots,
-        selected_lot=lot_id,
-        date_from=date_from,
-        date_to=date_to,
-        month=month,
-        year=year
-    ) 
\ No newline at end of file
+        selected_lot=filters['lot_id'],
+        date_from=filters['date_from'],
+        date_to=filters['date_to'],
+        month=filters['month'],
+        year=filters['year'],
+        filters=filters,
+        per_page=per_page,
+        cursor=cursor if position else None,
+        next_cursor=next_cursor
+    )
@@ -1,10 +1,14 @@
 from flask import render_template, request, redirect, url_for, flash, session
 from flask_login import login_required, current_user
 from ..admin import admin_bp
-from models import db, ParkingLot, ParkingSpot
+from models import db, ParkingLot
 from forms import ParkingLotForm
-from sqlalchemy import func, case
-import traceback
+from spot_allocator import spot_allocator
+from events import availability_hub
+from cache import cache
+from lot_capacity import add_spots
+from sqlalchemy.orm import selectinload
+from lot_stats import lot_summaries
 
 @admin_bp.route('/parking_lots', methods=['GET', 'POST'])
 @login_required
@@ -20,33 +24,22 @@ def admin_parking_lots():
             address=form.address.data,
             pincode=form.pincode.data,
             max_spots=form.max_spots.data,
-            price=form.price.data
+            price=form.price.data,
+            total_spots=0
         )
         db.session.add(lot)
+        db.session.flush()
+        spot_ids = add_spots(lot, lot.max_spots)
         db.session.commit()
-            
-        for i in range(lot.max_spots):
-            spot = ParkingSpot(
-                lot_id=lot.id,
-                status='A'
-            )
-            db.session.add(spot)
-            
-        db.session.commit()
+        spot_allocator.add_spots(lot.id, spot_ids)
+        cache.invalidate_lot(lot.id, details=True)
+        availability_hub.notify()
         flash('Parking lot added successfully!', 'success')
         return redirect(url_for('admin.admin_parking_lots'))
             
-    parking_lots_query = db.session.query(
-        ParkingLot, func.count(ParkingSpot.id).label('total_spots'),
-        func.sum(case((ParkingSpot.status == 'O', 1), else_=0)).label('occupied_spots')
-    ).outerjoin(
-        ParkingSpot, ParkingLot.id == ParkingSpot.lot_id
-    ).group_by(
-        ParkingLot.id
-    ).all()
-    parking_lots = [lot for lot, _, _ in parking_lots_query]
-    lot_revenues = {}
-    for lot in parking_lots:
-        revenue = db.session.query(func.sum(ParkingSpot.reservations.property.mapper.class_.parking_cost)).join(ParkingSpot).filter(ParkingSpot.lot_id == lot.id).scalar() or 0
-        lot_revenues[lot.id] = revenue
-    return render_template('admin/admin_parking_lots.html', form=form, parking_lots=parking_lots, lot_revenues=lot_revenues) 
\ No newline at end of file
+    parking_lots = ParkingLot.query.options(
+        selectinload(ParkingLot.spots)
+    ).order_by(ParkingLot.id).all()
+    lot_stats = {lot['id']: lot for lot in lot_summaries()}
+    lot_revenues = {lot_id: stats['revenue'] for lot_id, stats in lot_stats.items()}
+    return render_template('admin/admin_parking_lots.html', form=form, parking_lots=parking_lots, lot_stats=lot_stats, lot_revenues=lot_revenues) 
\ No newline at end of file
@@ -0,0 +1,14 @@
+from flask import render_template, redirect, url_for, flash, session
+from flask_login import login_required
+from ..admin import admin_bp
+from profiling import profiler
+
+@admin_bp.route('/perf')
+@login_required
+def perf():
+    if session.get('user_type') != 'admin':
+        flash('Access denied', 'danger')
+        return redirect(url_for('main.index'))
+
+    return render_template('admin/admin_perf.html', enabled=profiler.enabled,
+                           endpoints=profiler.store.summary(), window=profiler.store.window)
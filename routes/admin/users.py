@@ -1,48 +1,88 @@
-from flask import render_template, redirect, url_for, flash, session
+from flask import render_template, request, redirect, url_for, flash, session
 from flask_login import login_required, current_user
 from ..admin import admin_bp
+from replica import read_from_replica
 from models import db, User, Reservation, ParkingSpot, ParkingLot
-from sqlalchemy import func
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import aliased
+
+USERS_PER_PAGE = 50
+MAX_USERS_PER_PAGE = 200
 
 @admin_bp.route('/users')
 @login_required
+@read_from_replica(max_staleness=60)
 def admin_users():
     if session.get('user_type') != 'admin':
         flash('Access denied', 'danger')
         return redirect(url_for('main.index'))
     
-    users_query = db.session.query(
-        User,
-        func.count(Reservation.id).label('total_reservations'),
-        func.sum(Reservation.parking_cost).label('total_spent')
+    search = request.args.get('q', '').strip()
+    sort = request.args.get('sort', 'name-asc')
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', USERS_PER_PAGE, type=int), 1), MAX_USERS_PER_PAGE)
+    
+    key, _, direction = sort.partition('-')
+    if key not in ('name', 'signup', 'bookings', 'spent') or direction not in ('asc', 'desc'):
+        sort, key, direction = 'name-asc', 'name', 'asc'
+    
+    users_query = User.query
+    if search:
+        users_query = users_query.filter(or_(
+            User.name.ilike(f'%{search}%'),
+            User.email.ilike(f'%{search}%')
+        ))
+    total_users = users_query.count()
+    pages = max((total_users + per_page - 1) // per_page, 1)
+    
+    # Pick the page's user ids first. The name, bookings and spent sorts read
+    # them straight off an index on users (ix_users_name,
+    # ix_users_total_bookings, ix_users_total_spent); the totals are counters
+    # the booking engine keeps up to date.
+    sort_key = {
+        'name': User.name,
+        'signup': User.created_at,
+        'bookings': User.total_bookings,
+        'spent': User.total_spent
+    }[key]
+    page_ids = users_query.with_entities(User.id.label('user_id'), sort_key.label('sort_key')).order_by(
+        sort_key.desc() if direction == 'desc' else sort_key.asc(), User.id
+    ).limit(per_page).offset((page - 1) * per_page).subquery()
+    
+    # The open reservation is then looked up for those ids only. At most one
+    # per user (ix_reservations_open_user), so the outer join on it never
+    # multiplies rows.
+    open_reservation = aliased(Reservation)
+    rows = db.session.query(
+        User, open_reservation, ParkingSpot, ParkingLot
+    ).join(
+        page_ids, page_ids.c.user_id == User.id
+    ).outerjoin(
+        open_reservation,
+        and_(open_reservation.user_id == User.id, open_reservation.leaving_timestamp.is_(None))
     ).outerjoin(
-        Reservation, User.id == Reservation.user_id
-    ).group_by(
-        User.id
+        ParkingSpot, open_reservation.spot_id == ParkingSpot.id
+    ).outerjoin(
+        ParkingLot, ParkingSpot.lot_id == ParkingLot.id
+    ).order_by(
+        page_ids.c.sort_key.desc() if direction == 'desc' else page_ids.c.sort_key.asc(), User.id
     ).all()
+    
     users = []
-    for user, total_reservations, total_spent in users_query:
-        user.total_bookings = total_reservations
-        user.total_spent = total_spent or 0
-        users.append(user)
-        
     active_bookings = {}
-    for user in users:
-        active_booking = db.session.query(
-            Reservation, ParkingSpot, ParkingLot
-        ).join(
-            ParkingSpot, Reservation.spot_id == ParkingSpot.id
-        ).join(
-            ParkingLot, ParkingSpot.lot_id == ParkingLot.id
-        ).filter(
-            Reservation.user_id == user.id,
-            Reservation.leaving_timestamp.is_(None)
-        ).first()
-        active_bookings[user.id] = active_booking
+    for user, reservation, spot, lot in rows:
+        users.append(user)
+        active_bookings[user.id] = (reservation, spot, lot) if reservation else None
         
     return render_template('admin/admin_users.html',
         users=users,
-        active_bookings=active_bookings)
+        active_bookings=active_bookings,
+        search=search,
+        sort=sort,
+        page=page,
+        pages=pages,
+        per_page=per_page,
+        total_users=total_users)
             
 @admin_bp.route('/user/<int:user_id>/reservations')
 @login_required
@@ -2,13 +2,13 @@ from flask import jsonify, session
 from flask_login import login_required, current_user
 from ..api import api_bp
 from models import db, User, Reservation, ParkingSpot, ParkingLot
-from utils import format_ist_datetime
+from utils import format_ist_datetimes
 
 @api_bp.route('/admin/user/<int:user_id>/reservations')
 @login_required
 def admin_user_reservations(user_id):
     if session.get('user_type') != 'admin':
-        return jsonify({'success': False, 'message': 'Access denied'})
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
     
     user = User.query.get_or_404(user_id)
         
@@ -23,6 +23,8 @@ def admin_user_reservations(user_id):
     ).order_by(
         Reservation.parking_timestamp.desc()
     ).all()
+    parking_times = format_ist_datetimes([r[0].parking_timestamp for r in reservations])
+    leaving_times = format_ist_datetimes([r[0].leaving_timestamp for r in reservations])
         
     return jsonify({
         'success': True,
@@ -30,18 +32,17 @@ def admin_user_reservations(user_id):
             'user': {
                 'id': user.id,
                 'name': user.name,
-                'username': user.username,
                 'email': user.email
             },
             'reservations': [{
                 'id': r[0].id,
                 'lot_name': r[2].prime_location_name,
-                'spot_number': r[1].spot_number,
-                'parking_timestamp': format_ist_datetime(r[0].parking_timestamp),
-                'leaving_timestamp': format_ist_datetime(r[0].leaving_timestamp),
-                'status': r[0].status,
+                'spot_number': r[1].id,
+                'parking_timestamp': parking_time,
+                'leaving_timestamp': leaving_time,
+                'status': 'completed' if r[0].leaving_timestamp else 'active',
                 'cost': float(r[0].parking_cost) if r[0].parking_cost else None
-            } for r in reservations]
+            } for r, parking_time, leaving_time in zip(reservations, parking_times, leaving_times)]
         }
     })
         
@@ -1,52 +1,36 @@
-from datetime import datetime
 from flask import jsonify, request
 from flask_login import login_required, current_user
 from ..api import api_bp
-from models import db, ParkingSpot, Reservation
+from booking import reserve_spot, BookingError
 
 @api_bp.route('/book-parking', methods=['POST'])
 @login_required
 def book_parking():
-    spot_id = request.json.get('spot_id')
-    if not spot_id:
+    data = request.get_json(silent=True) or {}
+    spot_id = data.get('spot_id')
+    lot_id = data.get('lot_id')
+    if not spot_id and not lot_id:
         return jsonify({'success': False, 'message': 'No spot selected'})
         
-    spot = ParkingSpot.query.get(spot_id)
-    if not spot:
-        return jsonify({'success': False, 'message': 'Invalid spot'})
+    vehicle_number = data.get('vehicle_number')
+    if not vehicle_number:
+        return jsonify({'success': False, 'message': 'Vehicle number is required'})
         
-    if spot.status != 'A':
-        return jsonify({'success': False, 'message': 'Spot is not available'})
-        
-    active_booking = Reservation.query.filter_by(
-        user_id=current_user.id,
-        leaving_timestamp=None
-    ).first()
-        
-    if active_booking:
-        return jsonify({
-            'success': False,
-            'message': 'You already have an active booking'
-        })
-        
-    reservation = Reservation(
-        user_id=current_user.id,
-        spot_id=spot.id,
-        parking_timestamp=datetime.utcnow(),
-        status='active'
-    )
-        
-    spot.status = 'O'
-    db.session.add(reservation)
-    db.session.commit()
+    try:
+        if spot_id:
+            reservation = reserve_spot(current_user.id, vehicle_number, spot_id=spot_id)
+        else:
+            reservation = reserve_spot(current_user.id, vehicle_number, lot_id=lot_id)
+    except BookingError as e:
+        return jsonify({'success': False, 'message': str(e)})
         
     return jsonify({
         'success': True,
         'message': 'Spot booked successfully',
         'data': {
             'reservation_id': reservation.id,
-            'lot_name': spot.lot.prime_location_name,
-            'spot_number': spot.spot_number,
+            'lot_name': reservation.parking_spot.parking_lot.prime_location_name,
+            'spot_number': reservation.spot_id,
             'parking_timestamp': reservation.parking_timestamp.isoformat()
         }
     })
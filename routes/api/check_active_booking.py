@@ -2,10 +2,10 @@ from flask import jsonify
 from flask_login import login_required, current_user
 from ..api import api_bp
 from models import db, Reservation, ParkingSpot, ParkingLot
+from versions import user_stamp
+from utils import make_etag, conditional_response
 
-@api_bp.route('/check-active-booking')
-@login_required
-def check_active_booking():
+def active_booking_payload(user_id):
     active_reservation = db.session.query(
         Reservation, ParkingSpot, ParkingLot
     ).join(
@@ -13,7 +13,7 @@ def check_active_booking():
     ).join(
         ParkingLot, ParkingSpot.lot_id == ParkingLot.id
     ).filter(
-        Reservation.user_id == current_user.id,
+        Reservation.user_id == user_id,
         Reservation.leaving_timestamp.is_(None)
     ).first()
         
@@ -24,10 +24,17 @@ def check_active_booking():
             'data': {
                 'reservation_id': active_reservation[0].id,
                 'lot_name': active_reservation[2].prime_location_name,
-                'spot_number': active_reservation[1].spot_number,
+                'spot_number': active_reservation[1].id,
                 'parking_timestamp': active_reservation[0].parking_timestamp.isoformat()
             }
         })
         
     return jsonify({'success': True, 'has_active_booking': False})
+
+@api_bp.route('/check-active-booking')
+@login_required
+def check_active_booking():
+    user_id = current_user.id
+    etag = make_etag('active-booking', user_id, user_stamp(user_id))
+    return conditional_response(etag, lambda: active_booking_payload(user_id))
         
@@ -0,0 +1,27 @@
+from flask import jsonify, request, abort
+from flask_login import login_required, current_user
+from ..api import api_bp
+from spot_grid import changes_since
+
+@api_bp.route('/parking_lot/<int:lot_id>/spots/changes', methods=['GET'])
+@login_required
+def get_parking_lot_spot_changes(lot_id):
+    since = request.args.get('since', type=int)
+    if since is None:
+        return jsonify({'success': False, 'message': 'since is required'})
+
+    version, changes = changes_since(lot_id, since)
+    if version is None:
+        abort(404)
+    if changes is None:
+        # Too far behind or the lot was resized: reload ?format=bitmap.
+        return jsonify({'success': True, 'data': {'version': version, 'full_reload': True}})
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'version': version,
+            'full_reload': False,
+            'changes': changes
+        }
+    })
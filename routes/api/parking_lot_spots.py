@@ -1,12 +1,14 @@
-from flask import jsonify
+from flask import jsonify, abort, request
 from flask_login import login_required, current_user
 from ..api import api_bp
 from models import db, ParkingLot, ParkingSpot, Reservation
 from sqlalchemy import func, and_
+from cache import cache, lot_tag
+from versions import lot_stamp
+from spot_grid import lot_grid
+from utils import make_etag, conditional_response
 
-@api_bp.route('/parking_lot/<int:lot_id>/spots', methods=['GET'])
-@login_required
-def get_parking_lot_spots(lot_id):
+def parking_lot_spots(lot_id):
     lot = ParkingLot.query.get_or_404(lot_id)
         
     spots = db.session.query(
@@ -24,16 +26,44 @@ def get_parking_lot_spots(lot_id):
         ParkingSpot.id
     ).all()
         
-    return jsonify({
+    return {
+        'lot_name': lot.prime_location_name,
+        'price': float(lot.price),
+        'spots': [{
+            'id': spot[0].id,
+            'status': spot[0].status,
+            'has_active_reservation': spot[1] > 0
+        } for spot in spots]
+    }
+
+def parking_lot_spot_grid(lot_id):
+    lot = ParkingLot.query.get_or_404(lot_id)
+    grid = lot_grid(lot_id)
+    grid['lot_name'] = lot.prime_location_name
+    grid['price'] = float(lot.price)
+    return grid
+
+@api_bp.route('/parking_lot/<int:lot_id>/spots', methods=['GET'])
+@login_required
+def get_parking_lot_spots(lot_id):
+    # format=bitmap returns the compact map from spot_grid.encode_grid
+    # instead of one object per spot.
+    spot_format = request.args.get('format', 'list')
+    if spot_format not in ('list', 'bitmap'):
+        return jsonify({'success': False, 'message': 'Unsupported format'})
+
+    stamp = lot_stamp(lot_id)
+    if stamp is None:
+        abort(404)
+    etag = make_etag('lot-spots', spot_format, lot_id, *stamp)
+    # Keyed by the ETag as well: a body built before a write that lands in the
+    # cache after the write's invalidation is never served under the new ETag.
+    if spot_format == 'bitmap':
+        key, producer = f'lot_spot_grid:{lot_id}:{etag}', lambda: parking_lot_spot_grid(lot_id)
+    else:
+        key, producer = f'lot_spots:{lot_id}:{etag}', lambda: parking_lot_spots(lot_id)
+    return conditional_response(etag, lambda: jsonify({
         'success': True,
-        'data': {
-            'lot_name': lot.prime_location_name,
-            'price': float(lot.price),
-            'spots': [{
-                'id': spot[0].id,
-                'status': spot[0].status,
-                'has_active_reservation': spot[1] > 0
-            } for spot in spots]
-        }
-    })
+        'data': cache.get_or_set(key, producer, tags=(lot_tag(lot_id),))
+    }))
         
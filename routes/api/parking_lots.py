@@ -1,32 +1,30 @@
 from flask import jsonify
 from flask_login import login_required, current_user
 from ..api import api_bp
-from models import db, ParkingLot, ParkingSpot
-from sqlalchemy import func, case
+from models import ParkingLot
+from cache import cache, LOTS_TAG
+from versions import lot_list_stamp
+from utils import make_etag, conditional_response
+
+def parking_lot_list():
+    lots = ParkingLot.query.order_by(ParkingLot.id).all()
+    return [{
+        'id': lot.id,
+        'name': lot.prime_location_name,
+        'address': lot.address,
+        'pincode': lot.pincode,
+        'total_spots': lot.total_spots,
+        'occupied_spots': lot.occupied_spots,
+        'available_spots': lot.total_spots - lot.occupied_spots
+    } for lot in lots]
 
 @api_bp.route('/parking-lots')
 @login_required
 def api_parking_lots():
-    lots = db.session.query(
-        ParkingLot,
-        func.count(ParkingSpot.id).label('total_spots'),
-        func.sum(case((ParkingSpot.status == 'O', 1), else_=0)).label('occupied_spots')
-    ).outerjoin(
-        ParkingSpot, ParkingLot.id == ParkingSpot.lot_id
-    ).group_by(
-        ParkingLot.id
-    ).all()
-        
-    return jsonify({
+    etag = make_etag('parking-lots', *lot_list_stamp())
+    # Keyed by the ETag so the cached body always matches the version it is sent with
+    return conditional_response(etag, lambda: jsonify({
         'success': True,
-        'data': [{
-            'id': lot[0].id,
-            'name': lot[0].prime_location_name,
-            'address': lot[0].address,
-            'pincode': lot[0].pincode,
-            'total_spots': lot[1],
-            'occupied_spots': lot[2],
-            'available_spots': lot[1] - lot[2]
-        } for lot in lots]
-    })
+        'data': cache.get_or_set(f'api_parking_lots:{etag}', parking_lot_list, tags=(LOTS_TAG,))
+    }))
         
@@ -8,7 +8,7 @@ from sqlalchemy import or_
 @login_required
 def search_users():
     if session.get('user_type') != 'admin':
-        return jsonify({'success': False, 'message': 'Access denied'})
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
     
     query = request.args.get('q', '')
     if not query:
@@ -17,7 +17,6 @@ def search_users():
     users = User.query.filter(
         or_(
             User.name.ilike(f'%{query}%'),
-            User.username.ilike(f'%{query}%'),
             User.email.ilike(f'%{query}%')
         )
     ).limit(10).all()
@@ -27,7 +26,6 @@ def search_users():
         'data': [{
             'id': user.id,
             'name': user.name,
-            'username': user.username,
             'email': user.email,
             'address': user.address,
             'pincode': user.pincode
@@ -1,11 +1,12 @@
-from flask import jsonify
+from flask import jsonify, session
 from flask_login import login_required, current_user
 from ..api import api_bp
 from models import db, Reservation, ParkingSpot, ParkingLot
+from cache import cache, user_tag, LOT_DETAILS_TAG
+from versions import user_stamp
+from utils import make_etag, conditional_response
 
-@api_bp.route('/user/<int:user_id>/reservations')
-@login_required
-def api_user_reservations(user_id):
+def user_reservation_list(user_id):
     reservations = db.session.query(
         Reservation, ParkingSpot, ParkingLot
     ).join(
@@ -18,16 +19,29 @@ def api_user_reservations(user_id):
         Reservation.parking_timestamp.desc()
     ).all()
         
-    return jsonify({
+    return [{
+        'id': r[0].id,
+        'lot_name': r[2].prime_location_name,
+        'spot_number': r[1].id,
+        'parking_timestamp': r[0].parking_timestamp.isoformat() if r[0].parking_timestamp else None,
+        'leaving_timestamp': r[0].leaving_timestamp.isoformat() if r[0].leaving_timestamp else None,
+        'status': 'completed' if r[0].leaving_timestamp else 'active',
+        'cost': float(r[0].parking_cost) if r[0].parking_cost else None
+    } for r in reservations]
+
+@api_bp.route('/user/<int:user_id>/reservations')
+@login_required
+def api_user_reservations(user_id):
+    if current_user.id != user_id and session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+    etag = make_etag('user-reservations', user_id, user_stamp(user_id))
+    # Keyed by the ETag so the cached body always matches the version it is sent with
+    return conditional_response(etag, lambda: jsonify({
         'success': True,
-        'data': [{
-            'id': r[0].id,
-            'lot_name': r[2].prime_location_name,
-            'spot_number': r[1].spot_number,
-            'parking_timestamp': r[0].parking_timestamp.isoformat() if r[0].parking_timestamp else None,
-            'leaving_timestamp': r[0].leaving_timestamp.isoformat() if r[0].leaving_timestamp else None,
-            'status': r[0].status,
-            'cost': float(r[0].parking_cost) if r[0].parking_cost else None
-        } for r in reservations]
-    })
+        'data': cache.get_or_set(
+            f'user_reservations:{user_id}:{etag}',
+            lambda: user_reservation_list(user_id),
+            tags=(user_tag(user_id), LOT_DETAILS_TAG)
+        )
+    }))
         
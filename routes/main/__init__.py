@@ -2,4 +2,4 @@ from flask import Blueprint
 
 main_bp = Blueprint('main', __name__)
  
-from . import index, login, register 
\ No newline at end of file
+from . import index, login, register, events, metrics 
\ No newline at end of file
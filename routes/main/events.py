@@ -0,0 +1,47 @@
+import time
+from flask import Response, current_app
+from ..main import main_bp
+from events import availability_hub, availability_watcher, format_event
+
+RETRY_MILLISECONDS = 3000
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+KEEPALIVE_SECONDS = 15
+
+@main_bp.route('/events/availability')
+def availability_events():
+    config = current_app.config
+    availability_watcher.ensure_started()
+    subscriber = availability_hub.subscribe(config['AVAILABILITY_MAX_STREAMS'])
+    if subscriber is None:
+        # Every stream slot of this process is busy: answer like a poll from
+        # the hub's copy of the lots and let the browser reconnect after the
+        # retry delay.
+        body = f'retry: {RETRY_MILLISECONDS}\n\n'
+        lots = availability_hub.snapshot()
+        if lots is not None:
+            body += format_event('snapshot', lots)
+        return Response(body, mimetype='text/event-stream', headers=SSE_HEADERS)
+
+    def stream():
+        # Everything comes from the subscriber's queue; the stream itself
+        # never touches the database.
+        try:
+            yield f'retry: {RETRY_MILLISECONDS}\n\n'
+            deadline = time.monotonic() + config['AVAILABILITY_STREAM_SECONDS']
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if subscriber.lagging:
+                    subscriber.resync()
+                    lots = availability_hub.snapshot()
+                    if lots is not None:
+                        yield format_event('snapshot', lots)
+                message = subscriber.get(min(KEEPALIVE_SECONDS, remaining))
+                yield message if message is not None else ': keep-alive\n\n'
+        finally:
+            availability_hub.unsubscribe(subscriber)
+
+    # The stream ends after AVAILABILITY_STREAM_SECONDS so it cannot hold a
+    # server thread for good; EventSource reconnects by itself.
+    return Response(stream(), mimetype='text/event-stream', headers=SSE_HEADERS)
@@ -1,11 +1,15 @@
 from flask import render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from ..main import main_bp
-from models import db, User, ParkingLot, Reservation, ParkingSpot
-from datetime import datetime, timedelta
-import json
+from lot_stats import available_spot_count
+from cache import cache, LOTS_TAG
+from versions import lot_list_stamp
+from utils import make_etag
 
 @main_bp.route('/')
 def index():
-    available_spots = ParkingSpot.query.filter_by(status='A').count()
+    # Keyed by the lots' version: a miss that finishes after a booking has
+    # invalidated the tag can only fill a key nobody reads any more.
+    version = make_etag(*lot_list_stamp())
+    available_spots = cache.get_or_set(f'available_spots:{version}', available_spot_count, tags=(LOTS_TAG,))
     return render_template('main/index.html', available_spots=available_spots) 
\ No newline at end of file
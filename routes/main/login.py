@@ -1,9 +1,9 @@
-from flask import render_template, request, redirect, url_for, flash, session
+from flask import render_template, request, redirect, url_for, flash, session, current_app
 from flask_login import login_user, logout_user, login_required
 from ..main import main_bp
-from models import User
+from models import db, User
 from forms import LoginForm
-from werkzeug.security import check_password_hash
+from passwords import password_hasher, HasherBusy
 
 @main_bp.route('/login', methods=['GET', 'POST'])
 def login():
@@ -11,7 +11,21 @@ def login():
     if request.method == 'POST':
         if form.validate():
             user = User.query.filter_by(email=form.email.data).first()
-            if user and check_password_hash(user.password_hash, form.password.data):
+            try:
+                valid = user is not None and user.check_password(form.password.data)
+            except HasherBusy:
+                current_app.logger.warning('Password hashing queue full, turning a login away')
+                flash('Too many people are signing in right now. Please try again in a moment.', 'warning')
+                return render_template('main/login.html', form=form), 503
+            if valid:
+                if password_hasher.needs_rehash(user.password_hash):
+                    # Hashing settings changed since this password was stored
+                    try:
+                        user.set_password(form.password.data)
+                        db.session.commit()
+                        current_app.logger.info('Rehashed password of user %s', user.id)
+                    except HasherBusy:
+                        pass  # upgrade it at a later login
                 login_user(user)
                 if user.role == 'admin':
                     session['user_type'] = 'admin'
@@ -0,0 +1,14 @@
+import hmac
+from flask import Response, request, current_app
+from ..main import main_bp
+from metrics import metrics
+
+EXPOSITION_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+@main_bp.route('/metrics')
+def metrics_endpoint():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        # Scrapers go by the status code, so this one is not a JSON message
+        return Response('Unauthorized\n', status=401, content_type='text/plain')
+    return Response(metrics.render(), content_type=EXPOSITION_CONTENT_TYPE)
@@ -3,6 +3,7 @@ from flask_login import login_user
 from ..main import main_bp
 from models import db, User
 from forms import RegisterForm
+from passwords import HasherBusy
 
 @main_bp.route('/register', methods=['GET', 'POST'])
 def register():
@@ -14,7 +15,11 @@ def register():
             address='', 
             pincode=''  
         )
-        user.set_password(form.password.data)
+        try:
+            user.set_password(form.password.data)
+        except HasherBusy:
+            flash('Too many people are signing in right now. Please try again in a moment.', 'warning')
+            return render_template('main/register.html', form=form), 503
         db.session.add(user)
         db.session.commit()
             
@@ -1,8 +1,9 @@
-from datetime import datetime
-from flask import jsonify, request, render_template, redirect, url_for, flash
+from flask import request, render_template, redirect, url_for, flash
 from flask_login import login_required, current_user
 from ..user import user_bp
-from models import db, ParkingSpot, Reservation, ParkingLot
+from models import Reservation, ParkingLot
+from spot_allocator import spot_allocator
+from booking import reserve_spot, BookingError
 
 @user_bp.route('/book_spot/<int:lot_id>', methods=['GET'])
 @login_required
@@ -26,19 +27,14 @@ def book_spot_page(lot_id):
     # Get parking lot details
     lot = ParkingLot.query.get_or_404(lot_id)
     
-    # Get available spots
-    available_spots_query = ParkingSpot.query.filter_by(
-        parking_lot_id=lot_id,
-        status='A'
-    ).all()
-    
-    if not available_spots_query:
+    # The lot counters are shared by every worker; the allocator is per process
+    available_spots = lot.total_spots - lot.occupied_spots
+    if available_spots <= 0:
         flash('No available spots at this parking lot.', 'warning')
-        return redirect(url_for('user.parking_lots'))
+        return redirect(url_for('user.user_parking_lots'))
     
-    # Get first available spot
-    spot_id = available_spots_query[0].id
-    available_spots = len(available_spots_query)
+    # Only a hint: booking takes whichever spot is free when it commits
+    spot_id = spot_allocator.peek(lot_id)
     
     return render_template('user/book_spot.html', 
                          lot=lot, 
@@ -48,40 +44,27 @@ def book_spot_page(lot_id):
 @user_bp.route('/book_spot', methods=['POST'])
 @login_required
 def book_spot():
-    spot_id = request.form.get('spot_id')
-    if not spot_id:
+    lot_id = request.form.get('lot_id', type=int)
+    spot_id = request.form.get('spot_id', type=int)
+    if not lot_id and not spot_id:
         flash('No spot selected', 'danger')
-        return redirect(url_for('user.parking_lots'))
+        return redirect(url_for('user.user_parking_lots'))
         
-    spot = ParkingSpot.query.get(spot_id)
-    if not spot:
-        flash('Invalid spot', 'danger')
-        return redirect(url_for('user.parking_lots'))
+    vehicle_number = request.form.get('vehicle_number')
+    if not vehicle_number:
+        flash('Vehicle number is required', 'danger')
+        return redirect(url_for('user.user_parking_lots'))
         
-    if spot.status != 'A':
-        flash('Spot is not available', 'danger')
-        return redirect(url_for('user.parking_lots'))
-        
-    active_booking = Reservation.query.filter_by(
-        user_id=current_user.id,
-        leaving_timestamp=None
-    ).first()
-        
-    if active_booking:
-        flash('You already have an active booking', 'danger')
-        return redirect(url_for('user.user_dashboard'))
-        
-    reservation = Reservation(
-        user_id=current_user.id,
-        spot_id=spot.id,
-        parking_timestamp=datetime.utcnow(),
-        vehicle_number=request.form.get('vehicle_number')
-    )
-        
-    spot.status = 'O'
-    db.session.add(reservation)
-    db.session.commit()
+    # Auto-allot: take the next free spot of the lot rather than insisting on
+    # the one shown on the booking page, which may have gone in the meantime.
+    try:
+        if lot_id:
+            reserve_spot(current_user.id, vehicle_number, lot_id=lot_id)
+        else:
+            reserve_spot(current_user.id, vehicle_number, spot_id=spot_id)
+    except BookingError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('user.user_parking_lots'))
         
     flash('Spot booked successfully!', 'success')
     return redirect(url_for('user.user_dashboard'))
-        
@@ -2,6 +2,8 @@ from flask import render_template, request, redirect, url_for, flash, session
 from flask_login import login_required, current_user
 from ..user import user_bp
 from models import db
+from cache import cache, user_tag
+from versions import bump_user_version
 
 @user_bp.route('/edit_profile', methods=['GET', 'POST'])
 @login_required
@@ -15,7 +17,9 @@ def edit_profile():
         current_user.email = request.form.get('email')
         current_user.address = request.form.get('address')
         current_user.pincode = request.form.get('pincode')
+        bump_user_version(current_user.id)
         db.session.commit()
+        cache.invalidate(user_tag(current_user.id))
         flash('Profile updated successfully!', 'success')
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return {'success': True, 'message': 'Profile updated successfully!'}
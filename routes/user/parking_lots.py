@@ -1,7 +1,7 @@
 from flask import render_template, redirect, url_for, flash, session
 from flask_login import login_required, current_user
 from ..user import user_bp
-from models import ParkingLot, ParkingSpot
+from models import ParkingLot
 
 @user_bp.route('/parking_lots')
 @login_required
@@ -11,10 +11,5 @@ def user_parking_lots():
         return redirect(url_for('main.index'))
     
     parking_lots = ParkingLot.query.all()
-    available_spots = {}
-    available_spot_ids = {}
-    for lot in parking_lots:
-        spots = ParkingSpot.query.filter_by(lot_id=lot.id, status='A').all()
-        available_spots[lot.id] = len(spots)
-        available_spot_ids[lot.id] = [spot.id for spot in spots]
-    return render_template('user/user_parking_lots.html', parking_lots=parking_lots, available_spots=available_spots, available_spot_ids=available_spot_ids) 
\ No newline at end of file
+    available_spots = {lot.id: lot.total_spots - lot.occupied_spots for lot in parking_lots}
+    return render_template('user/user_parking_lots.html', parking_lots=parking_lots, available_spots=available_spots) 
\ No newline at end of file
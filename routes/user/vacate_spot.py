@@ -1,8 +1,9 @@
-from datetime import datetime
-from flask import jsonify, request, flash, redirect, url_for
+from flask import flash, redirect, url_for
 from flask_login import login_required, current_user
 from ..user import user_bp
-from models import db, Reservation, ParkingSpot
+from models import Reservation
+from booking import release_reservation, BookingError
+from metrics import RELEASES
 
 @user_bp.route('/vacate_spot/<int:reservation_id>', methods=['POST'])
 @login_required
@@ -20,26 +21,12 @@ def vacate_spot(reservation_id):
         flash('Spot already vacated', 'warning')
         return redirect(url_for('user.user_dashboard'))
         
-    now = datetime.utcnow()
-    duration = now - reservation.parking_timestamp
-    hours = duration.total_seconds() / 3600
-        
-    spot = ParkingSpot.query.get(reservation.spot_id)
-    if not spot:
-        flash('Spot not found', 'danger')
+    try:
+        release_reservation(reservation)
+    except BookingError as e:
+        flash(str(e), 'danger')
         return redirect(url_for('user.user_dashboard'))
+    RELEASES.inc(kind='vacate')
         
-    cost_per_hour = spot.parking_lot.price
-    parking_cost = round(hours * cost_per_hour, 2)
-    print(f"Vacate: spot_id={spot.id}, lot_id={spot.lot_id}, hours={hours}, cost_per_hour={cost_per_hour}, parking_cost={parking_cost}")
-        
-    reservation.leaving_timestamp = now
-    reservation.parking_cost = parking_cost
-    reservation.status = 'completed'
-        
-    spot.status = 'A'
-        
-    db.session.commit()
     flash('Spot vacated successfully!', 'success')
     return redirect(url_for('user.user_dashboard'))
-        
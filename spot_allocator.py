@@ -0,0 +1,110 @@
+import threading
+from collections import deque
+from models import db, ParkingSpot
+
+
+class SpotAllocator:
+    """Keeps the free spot ids of every lot in memory so booking never scans a lot.
+
+    Each lot has a FIFO free-list (deque) plus a set holding the ids that are
+    really free. The set is the source of truth; ids left in the deque after a
+    direct claim are skipped lazily when they reach the front.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues = {}
+        self._free = {}
+
+    def rebuild(self, lot_id=None):
+        """Reload the free-lists from parking_spots, for one lot or all of them."""
+        query = db.session.query(ParkingSpot.lot_id, ParkingSpot.id).filter(
+            ParkingSpot.status == 'A'
+        )
+        if lot_id is not None:
+            query = query.filter(ParkingSpot.lot_id == lot_id)
+        rows = query.order_by(ParkingSpot.lot_id, ParkingSpot.id).all()
+
+        queues = {}
+        free = {}
+        for row_lot_id, spot_id in rows:
+            queues.setdefault(row_lot_id, deque()).append(spot_id)
+            free.setdefault(row_lot_id, set()).add(spot_id)
+
+        with self._lock:
+            if lot_id is None:
+                self._queues = queues
+                self._free = free
+            else:
+                self._queues[lot_id] = queues.get(lot_id, deque())
+                self._free[lot_id] = free.get(lot_id, set())
+
+    def available_count(self, lot_id):
+        with self._lock:
+            return len(self._free.get(lot_id, ()))
+
+    def peek(self, lot_id):
+        """Return the spot that the next claim would hand out, without taking it."""
+        with self._lock:
+            queue = self._queues.get(lot_id)
+            free = self._free.get(lot_id)
+            while queue:
+                if queue[0] in free:
+                    return queue[0]
+                queue.popleft()
+            return None
+
+    def claim(self, lot_id, spot_id=None):
+        """Take a spot off the lot's free-list.
+
+        With no spot_id the next free spot is popped and returned (None if the
+        lot is full). With a spot_id that spot is removed and returned if it was
+        free, otherwise None.
+        """
+        with self._lock:
+            queue = self._queues.get(lot_id)
+            free = self._free.get(lot_id)
+            if not free:
+                return None
+            if spot_id is not None:
+                if spot_id not in free:
+                    return None
+                free.discard(spot_id)
+                return spot_id
+            while queue:
+                candidate = queue.popleft()
+                if candidate in free:
+                    free.discard(candidate)
+                    return candidate
+            return None
+
+    def release(self, lot_id, spot_id):
+        """Put a spot back at the end of its lot's free-list."""
+        with self._lock:
+            free = self._free.setdefault(lot_id, set())
+            if spot_id in free:
+                return
+            free.add(spot_id)
+            queue = self._queues.setdefault(lot_id, deque())
+            queue.append(spot_id)
+            # Direct claims leave stale ids behind; compact once they dominate.
+            if len(queue) > 2 * len(free) + 64:
+                self._queues[lot_id] = deque(spot for spot in queue if spot in free)
+
+    def add_spots(self, lot_id, spot_ids):
+        for spot_id in spot_ids:
+            self.release(lot_id, spot_id)
+
+    def remove_spots(self, lot_id, spot_ids):
+        with self._lock:
+            free = self._free.get(lot_id)
+            if free:
+                free.difference_update(spot_ids)
+
+    def remove_lot(self, lot_id):
+        with self._lock:
+            self._queues.pop(lot_id, None)
+            self._free.pop(lot_id, None)
+
+
+spot_allocator = SpotAllocator()
@@ -0,0 +1,102 @@
+import base64
+from sqlalchemy import select, delete
+from models import db, ParkingLot, ParkingSpot, SpotChange
+
+
+def encode_grid(spot_rows):
+    """Pack (spot_id, status) rows, sorted by id, into the compact spot map.
+
+    ranges lists runs of consecutive spot ids as [first_id, length]; spot
+    ids are mostly contiguous, so a lot is usually a single run. occupancy is
+    a base64 bitmap with one bit per spot in ranges order, least significant
+    bit first, set when the spot is occupied.
+    """
+    ranges = []
+    bitmap = bytearray((len(spot_rows) + 7) // 8)
+    occupied = 0
+    for index, (spot_id, status) in enumerate(spot_rows):
+        if ranges and ranges[-1][0] + ranges[-1][1] == spot_id:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([spot_id, 1])
+        if status == 'O':
+            bitmap[index >> 3] |= 1 << (index & 7)
+            occupied += 1
+    return {
+        'count': len(spot_rows),
+        'occupied': occupied,
+        'ranges': ranges,
+        'occupancy': base64.b64encode(bytes(bitmap)).decode('ascii')
+    }
+
+
+def decode_grid(grid):
+    """Inverse of encode_grid: a dict of spot_id -> status."""
+    bitmap = base64.b64decode(grid['occupancy'])
+    spots = {}
+    index = 0
+    for first_id, length in grid['ranges']:
+        for spot_id in range(first_id, first_id + length):
+            spots[spot_id] = 'O' if bitmap[index >> 3] >> (index & 7) & 1 else 'A'
+            index += 1
+    return spots
+
+
+def lot_grid(lot_id):
+    """The compact spot map of a lot with the version it reflects, or None if the lot is gone.
+
+    The version is read before the spots: if a booking lands in between, the
+    map is newer than its version and replaying the changes since that
+    version is harmless.
+    """
+    version = db.session.execute(
+        select(ParkingLot.version).where(ParkingLot.id == lot_id)
+    ).scalar()
+    if version is None:
+        return None
+    # Spot status is kept in step with open reservations, so the covering
+    # (lot_id, status) index answers this without touching reservations.
+    spot_rows = db.session.execute(
+        select(ParkingSpot.id, ParkingSpot.status)
+        .where(ParkingSpot.lot_id == lot_id)
+        .order_by(ParkingSpot.id)
+    ).all()
+    grid = encode_grid(spot_rows)
+    grid['version'] = version
+    return grid
+
+
+def record_change(lot_id, version, spot_id, status):
+    db.session.add(SpotChange(lot_id=lot_id, version=version, spot_id=spot_id, status=status))
+
+
+def changes_since(lot_id, since_version):
+    """Spot status changes of a lot after since_version.
+
+    Returns (version, changes) with changes as [[spot_id, status], ...] in
+    order, or (version, None) when the log cannot bridge the gap: the rows
+    were pruned, or a resize or repair bumped the version without logging
+    spot changes. Callers then reload the full map.
+    """
+    version = db.session.execute(
+        select(ParkingLot.version).where(ParkingLot.id == lot_id)
+    ).scalar()
+    if version is None or since_version > version:
+        return version, None
+    rows = db.session.execute(
+        select(SpotChange.version, SpotChange.spot_id, SpotChange.status)
+        .where(SpotChange.lot_id == lot_id, SpotChange.version > since_version, SpotChange.version <= version)
+        .order_by(SpotChange.version)
+    ).all()
+    # Every logged change bumps the version by exactly one, so a gap-free
+    # log has one row per version in the range.
+    if len(rows) != version - since_version:
+        return version, None
+    return version, [[spot_id, status] for _, spot_id, status in rows]
+
+
+def prune_changes(before):
+    """Delete change rows older than the given UTC datetime. The caller commits."""
+    return db.session.execute(
+        delete(SpotChange).where(SpotChange.changed_at < before)
+    ).rowcount
@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+import pytest
+
+# The app reads its configuration when it is imported, so the database is
+# chosen here, before any test module imports it:
+#   pytest                      a fresh SQLite file
+#   pytest --db=postgresql      an embedded PostgreSQL server (pip install pgserver)
+#   pytest --db=<url>           any other database URL; the tests empty it first
+_workdir = None
+_pg_server = None
+
+
+def pytest_addoption(parser):
+    parser.addoption('--db', default=os.environ.get('TEST_DATABASE', 'sqlite'),
+                     help="'sqlite', 'postgresql' or a database URL (default: $TEST_DATABASE or sqlite)")
+
+
+def pytest_configure(config):
+    global _workdir, _pg_server
+    _workdir = tempfile.mkdtemp(prefix='parking-tests-')
+    database = config.getoption('--db')
+    if database == 'sqlite':
+        url = f'sqlite:///{os.path.join(_workdir, "test.db")}'
+    elif database == 'postgresql':
+        try:
+            import pgserver
+        except ImportError:
+            raise pytest.UsageError('--db=postgresql needs the pgserver package')
+        _pg_server = pgserver.get_server(os.path.join(_workdir, 'pgdata'), cleanup_mode='delete')
+        _pg_server.psql('CREATE DATABASE parking_test;')
+        url = _pg_server.get_uri('parking_test')
+    else:
+        url = database
+    os.environ['DATABASE_URL'] = url
+    os.environ['APP_ENV'] = 'development'
+    os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    os.environ['OCCUPANCY_SAMPLE_SECONDS'] = '0'
+    os.environ['USER_CACHE_TTL'] = '0'
+
+
+def pytest_unconfigure(config):
+    if _pg_server is not None:
+        _pg_server.cleanup()
+    if _workdir is not None:
+        shutil.rmtree(_workdir, ignore_errors=True)
+
+
+def pytest_report_header(config):
+    return f'database: {os.environ.get("DATABASE_URL")}'
+
+
+@pytest.fixture(scope='session')
+def app():
+    # Importing the app creates the tables and the default admin
+    from app import app as flask_app
+    flask_app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return flask_app
+
+
+@pytest.fixture(autouse=True)
+def clean_database(app):
+    from app import create_default_admin
+    from models import db
+    from cache import cache
+    from spot_allocator import spot_allocator
+    with app.app_context():
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+        create_default_admin()
+        spot_allocator.rebuild()
+    cache.clear()
+    yield
+
+
+@pytest.fixture
+def make_user(app):
+    from models import db, User
+
+    def make(email='driver@example.com', password='secret1', name='Driver'):
+        with app.app_context():
+            user = User(email=email, name=name, role='user', address='1 Main St', pincode='400001')
+            user.set_password(password)
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return make
+
+
+@pytest.fixture
+def make_lot(app):
+    from models import db, ParkingLot
+    from lot_capacity import add_spots
+    from spot_allocator import spot_allocator
+
+    def make(spots=3, price=10.0, name='Central'):
+        with app.app_context():
+            lot = ParkingLot(prime_location_name=name, price=price, address='1 Main St',
+                             pincode=400001, max_spots=spots, total_spots=0)
+            db.session.add(lot)
+            db.session.flush()
+            spot_ids = add_spots(lot, spots)
+            db.session.commit()
+            spot_allocator.add_spots(lot.id, spot_ids)
+            return lot.id
+    return make
+
+
+@pytest.fixture
+def login(app):
+    def login_as(email, password):
+        client = app.test_client()
+        response = client.post('/login', data={'email': email, 'password': password})
+        assert response.status_code == 302, response.data
+        return client
+    return login_as
+
+
+@pytest.fixture
+def admin_client(login):
+    return login(os.environ.get('ADMIN_EMAIL', 'admin@parkease.com'), os.environ.get('ADMIN_PASSWORD', 'admin123'))
@@ -0,0 +1,58 @@
+import re
+import pytest
+
+
+@pytest.mark.parametrize('query', [
+    'month=13&year=2024',
+    'month=0&year=2024',
+    'month=5&year=99999',
+    'date_from=2024-13-40',
+    'date_to=yesterday',
+])
+def test_parking_history_ignores_invalid_filters(admin_client, query):
+    response = admin_client.get(f'/admin/parking_history?{query}')
+    assert response.status_code == 200
+    assert b'Ignored invalid filter' in response.data
+    assert admin_client.get(f'/admin/parking_history/export?{query}').status_code == 200
+
+
+def test_admin_pages_need_an_admin(make_user, login):
+    make_user()
+    client = login('driver@example.com', 'secret1')
+    assert client.get('/admin/parking_stats').status_code == 403
+    assert client.get('/admin/users').status_code == 302
+
+
+@pytest.mark.parametrize('sort, expected', [
+    ('name-asc', ['Admin User', 'Alice', 'Bob']),
+    ('name-desc', ['Carol', 'Bob', 'Alice']),
+])
+def test_users_page_sorts_and_pages(make_user, admin_client, sort, expected):
+    for name in ('Carol', 'Alice', 'Bob'):
+        make_user(f'{name.lower()}@example.com', name=name)
+    response = admin_client.get(f'/admin/users?sort={sort}&per_page=3')
+    assert response.status_code == 200
+    names = re.findall(r'<td class="">([A-Za-z ]+)</td>', response.get_data(as_text=True))
+    assert names[:3] == expected
+    assert b'Page 1 of 2' in response.data
+
+
+def test_users_page_sorts_by_booking_counters(app, make_user, make_lot, admin_client):
+    from datetime import timedelta
+    from booking import reserve_spot, release_reservation
+    from models import db, User
+    busy, idle = make_user('busy@example.com', name='Busy'), make_user('idle@example.com', name='Idle')
+    lot_id = make_lot(price=20)
+    with app.app_context():
+        for _ in range(2):
+            reservation = reserve_spot(busy, 'KA01', lot_id=lot_id)
+            reservation.parking_timestamp -= timedelta(hours=1)
+            db.session.commit()
+            release_reservation(reservation)
+        user = db.session.get(User, busy)
+        assert (user.total_bookings, db.session.get(User, idle).total_bookings) == (2, 0)
+        assert round(user.total_spent) == 40
+
+    for sort in ('bookings-desc', 'spent-desc'):
+        response = admin_client.get(f'/admin/users?sort={sort}&per_page=1')
+        assert re.findall(r'<td class="">([A-Za-z ]+)</td>', response.get_data(as_text=True))[:1] == ['Busy']
@@ -0,0 +1,69 @@
+from booking import reserve_spot
+
+
+def test_user_reservations_are_private(app, make_user, make_lot, login):
+    owner = make_user('owner@example.com')
+    make_user('other@example.com')
+    lot_id = make_lot()
+    with app.app_context():
+        reserve_spot(owner, 'KA01', lot_id=lot_id)
+
+    assert login('other@example.com', 'secret1').get(f'/api/user/{owner}/reservations').status_code == 403
+    response = login('owner@example.com', 'secret1').get(f'/api/user/{owner}/reservations')
+    assert response.status_code == 200
+    [reservation] = response.get_json()['data']
+    assert reservation['status'] == 'active'
+
+
+def test_admin_user_reservations(app, make_user, make_lot, login, admin_client):
+    user_id, lot_id = make_user(), make_lot()
+    with app.app_context():
+        reserve_spot(user_id, 'KA01', lot_id=lot_id)
+
+    assert login('driver@example.com', 'secret1').get(f'/api/admin/user/{user_id}/reservations').status_code == 403
+    response = admin_client.get(f'/api/admin/user/{user_id}/reservations')
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['user']['name'] == 'Driver'
+    assert [r['status'] for r in data['reservations']] == ['active']
+
+
+def test_user_search_is_admin_only(make_user, login, admin_client):
+    make_user()
+    assert login('driver@example.com', 'secret1').get('/api/users/search?q=dri').status_code == 403
+    response = admin_client.get('/api/users/search?q=dri')
+    assert response.status_code == 200
+    assert response.get_json()['success']
+
+
+def test_spot_map_etag_follows_bookings(app, make_user, make_lot, login):
+    user_id, lot_id = make_user(), make_lot(spots=2)
+    client = login('driver@example.com', 'secret1')
+    first = client.get(f'/api/parking_lot/{lot_id}/spots')
+    etag = first.headers['ETag']
+    assert client.get(f'/api/parking_lot/{lot_id}/spots', headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        reserve_spot(user_id, 'KA01', lot_id=lot_id)
+    second = client.get(f'/api/parking_lot/{lot_id}/spots', headers={'If-None-Match': etag})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != etag
+    assert [spot['status'] for spot in second.get_json()['data']['spots']].count('O') == 1
+
+
+def test_stats_filled_during_a_booking_are_not_served_after_it(app, make_user, make_lot, monkeypatch):
+    import routes.api.parking_stats as parking_stats
+    user_id, lot_id = make_user(), make_lot(spots=2)
+    original = parking_stats.lot_summaries
+
+    def racing_summaries():
+        # Read before the booking commits, stored after it invalidated the cache
+        summaries = original()
+        reserve_spot(user_id, 'KA01', lot_id=lot_id)
+        return summaries
+
+    client = app.test_client()
+    monkeypatch.setattr(parking_stats, 'lot_summaries', racing_summaries)
+    assert client.get('/api/parking_stats').get_json()['data'][0]['occupied_spots'] == 0
+    monkeypatch.setattr(parking_stats, 'lot_summaries', original)
+    assert client.get('/api/parking_stats').get_json()['data'][0]['occupied_spots'] == 1
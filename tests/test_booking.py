@@ -0,0 +1,43 @@
+import pytest
+from models import db, ParkingLot, ParkingSpot, Reservation
+from booking import reserve_spot, release_reservation, BookingError
+
+
+def test_booking_claims_a_free_spot(app, make_user, make_lot):
+    user_id, lot_id = make_user(), make_lot(spots=2)
+    with app.app_context():
+        reservation = reserve_spot(user_id, 'KA01AB1234', lot_id=lot_id)
+        assert db.session.get(ParkingSpot, reservation.spot_id).status == 'O'
+        assert db.session.get(ParkingLot, lot_id).occupied_spots == 1
+
+
+def test_second_open_booking_is_refused(app, make_user, make_lot):
+    user_id, lot_id = make_user(), make_lot(spots=2)
+    with app.app_context():
+        reserve_spot(user_id, 'KA01AB1234', lot_id=lot_id)
+        with pytest.raises(BookingError):
+            reserve_spot(user_id, 'KA01AB1234', lot_id=lot_id)
+        assert db.session.get(ParkingLot, lot_id).occupied_spots == 1
+        assert ParkingSpot.query.filter_by(lot_id=lot_id, status='O').count() == 1
+
+
+def test_full_lot_is_refused(app, make_user, make_lot):
+    lot_id = make_lot(spots=1)
+    first, second = make_user('a@example.com'), make_user('b@example.com')
+    with app.app_context():
+        reserve_spot(first, 'KA01', lot_id=lot_id)
+        with pytest.raises(BookingError):
+            reserve_spot(second, 'KA02', lot_id=lot_id)
+
+
+def test_release_frees_the_spot_and_bills(app, make_user, make_lot):
+    user_id, lot_id = make_user(), make_lot(spots=1, price=20)
+    with app.app_context():
+        reservation = reserve_spot(user_id, 'KA01AB1234', lot_id=lot_id)
+        _, _, cost = release_reservation(reservation)
+        assert cost >= 0
+        assert db.session.get(ParkingSpot, reservation.spot_id).status == 'A'
+        assert db.session.get(ParkingLot, lot_id).occupied_spots == 0
+        with pytest.raises(BookingError):
+            release_reservation(db.session.get(Reservation, reservation.id))
+
@@ -0,0 +1,108 @@
+import multiprocessing
+import threading
+from models import db, ParkingLot, ParkingSpot, Reservation
+from booking import reserve_spot, release_reservation, BookingError
+
+# Many bookers race for fewer spots than there are of them. A double booking
+# shows up as a spot held by two open reservations, or as lot counters that
+# disagree with the spot rows.
+
+
+def _assert_consistent(lot_id, expected_open):
+    open_spots = [spot_id for (spot_id,) in db.session.query(Reservation.spot_id).filter(
+        Reservation.leaving_timestamp.is_(None))]
+    assert len(open_spots) == expected_open
+    assert len(set(open_spots)) == expected_open
+    assert ParkingSpot.query.filter_by(lot_id=lot_id, status='O').count() == expected_open
+    assert db.session.get(ParkingLot, lot_id).occupied_spots == expected_open
+
+
+def _run_together(target, args_list):
+    threads = [threading.Thread(target=target, args=args) for args in args_list]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_concurrent_bookings_never_share_a_spot(app, make_user, make_lot):
+    lot_id = make_lot(spots=3)
+    user_ids = [make_user(f'driver{n}@example.com') for n in range(8)]
+    barrier = threading.Barrier(len(user_ids))
+    booked, refused = [], []
+
+    def book(user_id):
+        with app.app_context():
+            barrier.wait()
+            try:
+                booked.append(reserve_spot(user_id, 'KA01', lot_id=lot_id).spot_id)
+            except BookingError:
+                refused.append(user_id)
+
+    _run_together(book, [(user_id,) for user_id in user_ids])
+
+    assert len(booked) == 3 and len(set(booked)) == 3
+    assert len(refused) == 5
+    with app.app_context():
+        _assert_consistent(lot_id, 3)
+
+
+def test_bookings_and_releases_stay_consistent_over_many_rounds(app, make_user, make_lot):
+    lot_id = make_lot(spots=4)
+    user_ids = [make_user(f'driver{n}@example.com') for n in range(10)]
+    errors = []
+
+    def churn(user_id):
+        with app.app_context():
+            for _ in range(5):
+                try:
+                    reservation = reserve_spot(user_id, 'KA01', lot_id=lot_id)
+                except BookingError:
+                    continue
+                except Exception as error:
+                    errors.append(error)
+                    db.session.rollback()
+                    continue
+                release_reservation(reservation)
+            db.session.remove()
+
+    _run_together(churn, [(user_id,) for user_id in user_ids])
+
+    assert errors == []
+    with app.app_context():
+        _assert_consistent(lot_id, 0)
+        assert ParkingSpot.query.filter_by(lot_id=lot_id, status='A').count() == 4
+
+
+def _book_in_worker(app, user_id, lot_id, start, results):
+    # A forked process with its own connection pool and its own copy of the
+    # free-list, like a gunicorn worker.
+    with app.app_context():
+        start.wait()
+        try:
+            results.put(('booked', reserve_spot(user_id, 'KA01', lot_id=lot_id).spot_id))
+        except BookingError:
+            results.put(('refused', user_id))
+        except Exception as error:
+            results.put(('error', repr(error)))
+
+
+def test_worker_processes_never_share_a_spot(app, make_user, make_lot):
+    lot_id = make_lot(spots=2)
+    user_ids = [make_user(f'driver{n}@example.com') for n in range(6)]
+    context = multiprocessing.get_context('fork')
+    start, results = context.Event(), context.Queue()
+    workers = [context.Process(target=_book_in_worker, args=(app, user_id, lot_id, start, results))
+               for user_id in user_ids]
+    for worker in workers:
+        worker.start()
+    start.set()
+    outcomes = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    booked = [value for outcome, value in outcomes if outcome == 'booked']
+    assert [outcome for outcome, _ in outcomes if outcome == 'error'] == []
+    assert len(booked) == 2 and len(set(booked)) == 2
+    with app.app_context():
+        _assert_consistent(lot_id, 2)
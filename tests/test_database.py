@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import create_engine
+from database import require_returning
+
+
+def test_engine_under_test_supports_returning(app):
+    from models import db
+    with app.app_context():
+        require_returning(db.engine)
+
+
+def test_databases_without_returning_are_refused():
+    engine = create_engine('sqlite://')
+    with engine.connect():
+        pass
+    # What MySQL reports
+    engine.dialect.update_returning = False
+    with pytest.raises(RuntimeError, match='RETURNING'):
+        require_returning(engine)
+
+
+def test_schema_state_follows_the_migrations(tmp_path):
+    from app import MIGRATIONS_DIR
+    from database import schema_state, stamp_head
+    from models import db
+    engine = create_engine(f'sqlite:///{tmp_path / "schema.db"}')
+    assert schema_state(engine, MIGRATIONS_DIR) == 'empty'
+    # Tables from before migrations existed, with no revision recorded
+    db.metadata.tables['users'].create(engine)
+    assert schema_state(engine, MIGRATIONS_DIR) == 'behind'
+    stamp_head(engine, MIGRATIONS_DIR)
+    assert schema_state(engine, MIGRATIONS_DIR) == 'current'
+    with engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE alembic_version SET version_num = '5f1c2a9d3b10'")
+    assert schema_state(engine, MIGRATIONS_DIR) == 'behind'
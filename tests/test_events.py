@@ -0,0 +1,75 @@
+import json
+import threading
+from sqlalchemy import event
+from events import EventHub, availability_hub, lot_event_data
+from booking import reserve_spot
+
+
+def _read_event(stream):
+    # Skips the retry line and keep-alive comments
+    while True:
+        chunk = next(stream).decode()
+        if chunk.startswith('event: '):
+            name, data = chunk.split('\n')[:2]
+            return name[len('event: '):], json.loads(data[len('data: '):])
+
+
+def test_hub_fans_out_only_changed_lots():
+    hub = EventHub()
+    first = hub.subscribe(limit=5)
+    hub.publish({1: lot_event_data(1, 0, 3), 2: lot_event_data(2, 1, 2)})
+    assert first.get(0).startswith('event: snapshot')
+
+    second = hub.subscribe(limit=5)
+    assert second.get(0).startswith('event: snapshot')
+    hub.publish({1: lot_event_data(1, 1, 3)})
+    for subscriber in (first, second):
+        message = subscriber.get(0)
+        assert message.startswith('event: lots')
+        assert json.loads(message.split('data: ')[1]) == [lot_event_data(1, 1, 3), {'lot_id': 2, 'removed': True}]
+    assert first.get(0) is None
+
+
+def test_hub_limits_subscribers_and_flags_slow_ones():
+    hub = EventHub(queue_size=1)
+    subscriber = hub.subscribe(limit=1)
+    assert hub.subscribe(limit=1) is None
+    hub.publish({1: lot_event_data(1, 0, 3)})
+    hub.publish({1: lot_event_data(1, 1, 3)})
+    assert subscriber.lagging
+    subscriber.resync()
+    assert not subscriber.lagging and subscriber.get(0) is None
+    hub.unsubscribe(subscriber)
+    assert hub.subscriber_count() == 0 and hub.snapshot() is None
+
+
+def test_streams_never_query_the_database(app, make_user, make_lot):
+    from models import db
+    app.config.update(AVAILABILITY_STREAM_SECONDS=10, AVAILABILITY_POLL_SECONDS=5)
+    user_id, lot_id = make_user(), make_lot(spots=3)
+    client = app.test_client()
+    responses = [client.get('/events/availability', buffered=False) for _ in range(3)]
+    streams = [iter(response.response) for response in responses]
+    for stream in streams:
+        assert _read_event(stream) == ('snapshot', [lot_event_data(lot_id, 0, 3)])
+
+    with app.app_context():
+        engine = db.engine
+    lot_reads = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM parking_lots' in statement:
+            lot_reads.append(threading.current_thread().name)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        with app.app_context():
+            reserve_spot(user_id, 'KA01', lot_id=lot_id)
+        for stream in streams:
+            assert _read_event(stream) == ('lots', [lot_event_data(lot_id, 1, 3)])
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+        for response in responses:
+            response.close()
+    assert set(lot_reads) == {'availability-watcher'}
+    assert availability_hub.subscriber_count() == 0
@@ -0,0 +1,38 @@
+from datetime import datetime
+import pytest
+from models import db, ParkingLot, ParkingSpot, Reservation
+from lot_capacity import add_spots, remove_free_spots, CapacityError
+
+
+def test_add_spots_returns_the_new_ids(app, make_lot):
+    lot_id = make_lot(spots=2)
+    with app.app_context():
+        lot = db.session.get(ParkingLot, lot_id)
+        spot_ids = add_spots(lot, 3)
+        db.session.commit()
+        assert len(spot_ids) == 3
+        assert ParkingSpot.query.filter_by(lot_id=lot_id).count() == 5
+        assert lot.total_spots == 5
+
+
+def test_shrinking_keeps_spots_with_history(app, make_user, make_lot):
+    user_id, lot_id = make_user(), make_lot(spots=3)
+    with app.app_context():
+        spot_ids = [spot.id for spot in ParkingSpot.query.filter_by(lot_id=lot_id).order_by(ParkingSpot.id)]
+        db.session.add(Reservation(spot_id=spot_ids[-1], user_id=user_id, vehicle_number='KA01',
+                                   parking_timestamp=datetime(2024, 1, 1, 9),
+                                   leaving_timestamp=datetime(2024, 1, 1, 11), parking_cost=20))
+        db.session.commit()
+
+        lot = db.session.get(ParkingLot, lot_id)
+        remove_free_spots(lot, 1)
+        db.session.commit()
+        remaining = [spot.id for spot in ParkingSpot.query.filter_by(lot_id=lot_id).order_by(ParkingSpot.id)]
+        assert remaining == [spot_ids[0], spot_ids[2]]
+        assert lot.total_spots == 2
+
+        with pytest.raises(CapacityError):
+            remove_free_spots(lot, 2)
+        db.session.rollback()
+        assert Reservation.query.count() == 1
+        assert ParkingSpot.query.filter_by(lot_id=lot_id).count() == 2
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+from models import db, OccupancySnapshot
+from occupancy import compact_snapshots, hourly_utilization, floor_ist_hour
+
+
+def test_floor_ist_hour_starts_at_half_past_utc():
+    assert floor_ist_hour(datetime(2024, 1, 1, 3, 45)) == datetime(2024, 1, 1, 3, 30)
+    assert floor_ist_hour(datetime(2024, 1, 1, 3, 15)) == datetime(2024, 1, 1, 2, 30)
+
+
+def test_compaction_keeps_samples_in_their_ist_hour(app, make_lot):
+    lot_id = make_lot(spots=4)
+    # IST 09:00-10:55 three days ago: every spot taken from 09:00 to 09:55, none after
+    day = datetime.combine((datetime.utcnow() - timedelta(days=3)).date(), datetime.min.time())
+    nine_ist = day + timedelta(hours=3, minutes=30)
+    with app.app_context():
+        for minute in range(0, 120, 5):
+            occupied = 4 if minute < 60 else 0
+            db.session.add(OccupancySnapshot(lot_id=lot_id, taken_at=nine_ist + timedelta(minutes=minute),
+                                             resolution=300, occupied=occupied, peak=occupied, total=4, samples=1))
+        db.session.commit()
+        before = hourly_utilization(7, lot_id)
+
+        folded, _ = compact_snapshots(timedelta(hours=1), timedelta(days=30))
+        db.session.commit()
+        assert folded == 24
+        rows = OccupancySnapshot.query.filter_by(lot_id=lot_id).order_by(OccupancySnapshot.taken_at).all()
+        assert [(row.taken_at, row.occupied, row.samples) for row in rows] == [
+            (nine_ist, 4, 12), (nine_ist + timedelta(hours=1), 0, 12)]
+        after = hourly_utilization(7, lot_id)
+        weekday = (nine_ist + timedelta(hours=5, minutes=30)).weekday()
+        assert after[weekday][9:11] == [1.0, 0.0]
+        assert after == before
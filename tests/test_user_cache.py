@@ -0,0 +1,49 @@
+import pytest
+from cache import cache
+from models import db, User
+import user_cache
+
+
+@pytest.fixture
+def cached_identities(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'USER_CACHE_TTL', 60)
+
+
+def test_admin_edit_evicts_the_cached_identity(cached_identities, make_user, login, admin_client):
+    user_id = make_user()
+    client = login('driver@example.com', 'secret1')
+    assert b'Welcome, Driver' in client.get('/user/dashboard').data
+    assert cache.backend.get(f'identity:{user_id}') is not None
+
+    response = admin_client.post(f'/admin/edit_user/{user_id}', data={
+        'full_name': 'Renamed Driver', 'email': 'driver@example.com',
+        'address': '2 Main St', 'pincode': '400002'
+    })
+    assert response.get_json()['success']
+    assert cache.backend.get(f'identity:{user_id}') is None
+    assert b'Welcome, Renamed Driver' in client.get('/user/dashboard').data
+
+
+def test_edit_during_a_miss_is_not_cached(app, cached_identities, make_user, monkeypatch):
+    from versions import bump_user_version
+    from cache import user_tag
+    user_id = make_user()
+    read_identity = user_cache._identity
+
+    def racing_identity(user_id):
+        # The row is read, then an edit commits and invalidates before it is stored
+        row = read_identity(user_id)
+        db.session.query(User).filter_by(id=user_id).update({'name': 'Edited'})
+        bump_user_version(user_id)
+        db.session.commit()
+        cache.invalidate(user_tag(user_id))
+        return row
+
+    monkeypatch.setattr(user_cache, '_identity', racing_identity)
+    with app.test_request_context():
+        assert user_cache.load_cached_user(user_id).name == 'Driver'
+    assert cache.backend.get(f'identity:{user_id}') is None
+
+    monkeypatch.setattr(user_cache, '_identity', read_identity)
+    with app.test_request_context():
+        assert user_cache.load_cached_user(user_id).name == 'Edited'
@@ -0,0 +1,68 @@
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached
+from models import db, User
+from cache import cache, user_tag
+
+# What a request needs to know about the signed-in user. password_hash stays
+# out of the cache, and version changes with every booking; both are loaded
+# from the database if something reads them.
+IDENTITY_COLUMNS = ('id', 'email', 'name', 'address', 'pincode', 'role', 'created_at')
+
+
+def _identity(user_id):
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    row = {name: getattr(user, name) for name in IDENTITY_COLUMNS}
+    # Cache values must be JSON-serialisable for the SQLite backend
+    row['created_at'] = row['created_at'].isoformat() if row['created_at'] else None
+    # Only used to check the entry right after it is stored
+    row['version'] = user.version
+    return row
+
+
+def _current_version(user_id):
+    # A connection of its own: the request's session may still be reading an
+    # older snapshot (SQLite) and miss the commit being checked for.
+    with db.engine.connect() as connection:
+        return connection.execute(select(User.version).where(User.id == user_id)).scalar()
+
+
+def load_cached_user(user_id):
+    """The user for Flask-Login, usually without a SELECT.
+
+    The identity columns are cached for USER_CACHE_TTL seconds under the
+    user's cache tag, so profile edits and deletion (which invalidate that
+    tag) take effect on the next request in every worker. A hit is attached
+    to the session as an already-loaded instance, so relationships and
+    updates work as on a queried user.
+
+    Edits and deletion also move or remove the user's version. A miss reads
+    it along with the row and checks it again once the entry is stored: if
+    an edit committed and invalidated in between, the entry it just stored
+    is stale and is dropped instead of being served until the TTL.
+    """
+    ttl = current_app.config.get('USER_CACHE_TTL', 0)
+    if not ttl:
+        return db.session.get(User, user_id)
+    filled = []
+
+    def fill():
+        filled.append(_identity(user_id))
+        return filled[0]
+
+    row = cache.get_or_set(f'identity:{user_id}', fill, ttl=ttl, tags=(user_tag(user_id),))
+    if filled and (row['version'] if row else None) != _current_version(user_id):
+        cache.invalidate(user_tag(user_id))
+    if row is None:
+        return None
+    fields = dict(row)
+    fields.pop('version', None)
+    if fields['created_at']:
+        fields['created_at'] = datetime.fromisoformat(fields['created_at'])
+    user = User(**fields)
+    make_transient_to_detached(user)
+    # Returns the session's own instance when this request already loaded it
+    return db.session.merge(user, load=False)
@@ -1,16 +1,73 @@
-from datetime import datetime
+import hashlib
+from datetime import datetime, timedelta
+from flask import request, make_response
 from pytz import timezone
 
+UTC = timezone('UTC')
+IST = timezone('Asia/Kolkata')
+
+# Asia/Kolkata has been a fixed +05:30 with no DST since this UTC instant.
+# Naive UTC datetimes after it are shifted directly; anything older goes
+# through pytz so the historic offsets stay exact.
+IST_FIXED_SINCE = datetime(1945, 10, 14, 17, 30)
+IST_OFFSET = timedelta(hours=5, minutes=30)
+
 def utc_to_ist(utc_dt):
     if utc_dt is None:  # this will convert utc datetime into ist datetime
         return None
-    if utc_dt.tzinfo is None: 
-        utc_dt = timezone('UTC').localize(utc_dt)
-    ist = timezone('Asia/Kolkata')
-    return utc_dt.astimezone(ist)
+    if utc_dt.tzinfo is None:
+        utc_dt = UTC.localize(utc_dt)
+    return utc_dt.astimezone(IST)
+
+def ist_date(utc_dt):
+    """The IST calendar date of a UTC datetime."""
+    if utc_dt.tzinfo is None and utc_dt >= IST_FIXED_SINCE:
+        return (utc_dt + IST_OFFSET).date()
+    return utc_to_ist(utc_dt).date()
 
 def format_ist_datetime(utc_dt, format='%Y-%m-%d %H:%M'):
-    if utc_dt is None: 
+    if utc_dt is None:
         return 'N/A'
+    # %z/%Z need a real tzinfo, so only plain formats take the shortcut.
+    if utc_dt.tzinfo is None and utc_dt >= IST_FIXED_SINCE and '%z' not in format and '%Z' not in format:
+        return (utc_dt + IST_OFFSET).strftime(format)
     ist_dt = utc_to_ist(utc_dt)
-    return ist_dt.strftime(format) 
\ No newline at end of file
+    return ist_dt.strftime(format)
+
+def format_ist_datetimes(utc_dts, format='%Y-%m-%d %H:%M'):
+    """Format a whole column of UTC datetimes in one call.
+
+    Output is identical to calling format_ist_datetime on each value.
+    """
+    if '%z' in format or '%Z' in format:
+        return [format_ist_datetime(utc_dt, format) for utc_dt in utc_dts]
+
+    offset = IST_OFFSET
+    fixed_since = IST_FIXED_SINCE
+    formatted = []
+    append = formatted.append
+    for utc_dt in utc_dts:
+        if utc_dt is None:
+            append('N/A')
+        elif utc_dt.tzinfo is None and utc_dt >= fixed_since:
+            append((utc_dt + offset).strftime(format))
+        else:
+            append(utc_to_ist(utc_dt).strftime(format))
+    return formatted
+
+def make_etag(*parts):
+    """Hash a version stamp (any mix of values) into an ETag value."""
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+def conditional_response(etag, build):
+    """Answer with 304 if the client already holds this weak ETag, else with build().
+
+    build is only called when the payload is actually needed.
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(build())
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
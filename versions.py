@@ -0,0 +1,62 @@
+from sqlalchemy import update, select, func
+from models import db, User, ParkingLot, ParkingSpot, Reservation
+
+# Change counters behind the JSON API ETags. Every write that changes what an
+# endpoint returns bumps the matching counter in the same transaction, so a
+# client's ETag can be checked with one primary-key lookup instead of
+# rebuilding the payload. Bumps are SQL increments, never read-modify-write,
+# so concurrent writers cannot hand out the same version twice.
+
+
+def bump_lot_version(lot_id):
+    db.session.execute(
+        update(ParkingLot)
+        .where(ParkingLot.id == lot_id)
+        .values(version=ParkingLot.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def bump_user_version(user_id):
+    db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(version=User.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def bump_lot_user_versions(lot_id):
+    """Bump every user with a reservation in the lot, for edits that change their history."""
+    lot_users = select(Reservation.user_id).join(
+        ParkingSpot, Reservation.spot_id == ParkingSpot.id
+    ).where(ParkingSpot.lot_id == lot_id)
+    db.session.execute(
+        update(User)
+        .where(User.id.in_(lot_users))
+        .values(version=User.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def lot_stamp(lot_id):
+    """(created_at, version) for one lot, or None if it does not exist."""
+    return db.session.execute(
+        select(ParkingLot.created_at, ParkingLot.version).where(ParkingLot.id == lot_id)
+    ).one_or_none()
+
+
+def lot_list_stamp():
+    """One row that changes whenever any lot is added, removed or changed."""
+    return tuple(db.session.execute(select(
+        func.count(ParkingLot.id),
+        func.max(ParkingLot.created_at),
+        func.sum(ParkingLot.version)
+    )).one())
+
+
+def user_stamp(user_id):
+    """(created_at, version) for one user, or None if it does not exist."""
+    return db.session.execute(
+        select(User.created_at, User.version).where(User.id == user_id)
+    ).one_or_none()
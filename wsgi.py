@@ -0,0 +1,6 @@
+import os
+
+# Production entry point, e.g. `gunicorn --workers 4 --threads 32 wsgi:app`.
+os.environ.setdefault('APP_ENV', 'production')
+
+from app import app